@@ -5,7 +5,7 @@ import traceback
 
 from PySide6 import QtWidgets
 
-from qt_app.db import ensure_db_initialized
+from qt_app.db import close_connection, ensure_db_initialized
 from qt_app.ui.app_style import apply_app_style
 from qt_app.ui.login_dialog import LoginDialog
 from qt_app.ui.main_window import MainWindow, Session
@@ -23,6 +23,7 @@ def main() -> int:
     app = QtWidgets.QApplication(sys.argv)
     app.setApplicationName("УЗИ-протоколирование")
     apply_app_style(app)
+    app.aboutToQuit.connect(close_connection)
 
     while True:
         login = LoginDialog()
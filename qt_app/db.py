@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 import sqlite3
+import threading
 from pathlib import Path
 
 from .paths import db_path
@@ -26,13 +27,56 @@ def ensure_db_initialized() -> Path:
     return path
 
 
-def connect() -> sqlite3.Connection:
-    path = ensure_db_initialized()
-    conn = sqlite3.connect(str(path))
+# Одно соединение на GUI-поток: без открытия файла и разбора схемы на каждый запрос,
+# а кэш подготовленных выражений sqlite3 живёт между вызовами.
+# Потоки пула (фоновые загрузчики) соединение не держат: открывают своё на запрос и закрывают
+# на выходе из with — иначе после импорта в DatabaseAdminDialog они читали бы подменённый файл
+# через старые дескрипторы, а на Windows открытый файл мешал бы его замене.
+# WAL не включаем: бэкап/экспорт/импорт в DatabaseAdminDialog копируют сам .db файл.
+_local = threading.local()
+
+
+class _ClosingConnection(sqlite3.Connection):
+    """Соединение потока пула: with фиксирует/откатывает транзакцию и закрывает его."""
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            return super().__exit__(exc_type, exc, tb)
+        finally:
+            self.close()
+
+
+def _open(path: Path, factory: type[sqlite3.Connection] = sqlite3.Connection) -> sqlite3.Connection:
+    conn = sqlite3.connect(str(path), cached_statements=256, factory=factory)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA cache_size = -20000")
     return conn
 
 
+def connect() -> sqlite3.Connection:
+    if threading.current_thread() is not threading.main_thread():
+        return _open(ensure_db_initialized(), _ClosingConnection)
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        return conn
+    conn = _open(ensure_db_initialized())
+    _local.conn = conn
+    return conn
+
+
+def close_connection() -> None:
+    """Закрывает соединение GUI-потока (выход из приложения, замена файла БД)."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    _local.conn = None
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
 def _init_schema(conn: sqlite3.Connection) -> None:
     """
     Базовая схема БД для Qt-версии (без зависимости от старого Tkinter-проекта).
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
+from itertools import groupby
 import re
+import threading
+import time
 
 from .db import connect
 
@@ -12,6 +16,21 @@ class ComboItem:
     name: str
 
 
+@dataclass(frozen=True, slots=True)
+class ComboBatch:
+    """Пункты для комбобокса столбцами: имена и id (int64) в параллельных массивах. Только для чтения."""
+
+    names: list[str] = field(default_factory=list)
+    ids: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+
+def _combo_batch(rows) -> ComboBatch:
+    return ComboBatch([str(r["name"]) for r in rows], array("q", [int(r["id"]) for r in rows]))
+
+
 @dataclass(frozen=True)
 class PatientListItem:
     id: int
@@ -28,17 +47,73 @@ class ProtocolListItem:
     study_name: str
     study_type_id: int
     is_signed: bool
+    # "<исследование> <дата>" — подпись строки в списке протоколов, собирается в SQL
+    display_title: str = ""
+
+
+# Кэш справочников (учреждения/врачи/аппараты/каналы поступления): они почти не меняются,
+# а окна входа и пациента перечитывают их после каждого открытия настроек. Запись сбрасывается
+# при смене версии (invalidate_lookup_cache() после правок) или по истечении TTL.
+# Читают и пишут кэш и GUI-поток, и фоновые загрузчики из пула — отсюда блокировка.
+_LOOKUP_TTL_S = 30.0
+_lookup_lock = threading.Lock()
+_lookup_version = 0
+_lookup_cache: dict[tuple, tuple[int, float, object]] = {}
+
+
+def invalidate_lookup_cache() -> None:
+    global _lookup_version
+    with _lookup_lock:
+        _lookup_version += 1
+        _lookup_cache.clear()
+
+
+def lookup_version() -> int:
+    """Счётчик изменений справочников: растёт при каждом invalidate_lookup_cache()."""
+    return _lookup_version
+
+
+def _lookup_cached(key: tuple):
+    with _lookup_lock:
+        hit = _lookup_cache.get(key)
+    if hit is None:
+        return None
+    version, stamp, value = hit
+    if version != _lookup_version or time.monotonic() - stamp > _LOOKUP_TTL_S:
+        return None
+    return value
 
 
-def list_institutions() -> list[ComboItem]:
+def _lookup_store(key: tuple, value, version: int) -> None:
+    """Запомнить результат запроса, начатого при версии version (lookup_version() до запроса)."""
+    with _lookup_lock:
+        # Пока шёл запрос, справочники поменяли — результат мог устареть, не запоминаем
+        if version != _lookup_version:
+            return
+        _lookup_cache[key] = (version, time.monotonic(), value)
+
+
+def list_institutions() -> ComboBatch:
+    key = ("institutions",)
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return cached
+    version = lookup_version()
     with connect() as conn:
         rows = conn.execute(
             "SELECT id, name FROM institutions WHERE is_active = 1 ORDER BY name"
         ).fetchall()
-    return [ComboItem(int(r["id"]), str(r["name"])) for r in rows]
+    batch = _combo_batch(rows)
+    _lookup_store(key, batch, version)
+    return batch
 
 
-def list_doctors(institution_id: int) -> list[ComboItem]:
+def list_doctors(institution_id: int) -> ComboBatch:
+    key = ("doctors", int(institution_id))
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return cached
+    version = lookup_version()
     with connect() as conn:
         rows = conn.execute(
             """
@@ -49,10 +124,42 @@ def list_doctors(institution_id: int) -> list[ComboItem]:
             """,
             (institution_id,),
         ).fetchall()
-    return [ComboItem(int(r["id"]), str(r["name"])) for r in rows]
-
-
-def list_devices(institution_id: int) -> list[ComboItem]:
+    batch = _combo_batch(rows)
+    _lookup_store(key, batch, version)
+    return batch
+
+
+def list_doctors_by_institution() -> dict[int, ComboBatch]:
+    """Активные врачи всех активных учреждений одним запросом: {institution_id: ComboBatch}."""
+    key = ("doctors_by_institution",)
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return cached
+    version = lookup_version()
+    with connect() as conn:
+        rows = conn.execute(
+            """
+            SELECT d.institution_id, d.id, d.full_name AS name
+            FROM doctors d
+            JOIN institutions i ON i.id = d.institution_id
+            WHERE d.is_active = 1 AND i.is_active = 1
+            ORDER BY d.institution_id, d.full_name
+            """
+        ).fetchall()
+    result = {
+        int(inst_id): _combo_batch(list(group))
+        for inst_id, group in groupby(rows, key=lambda r: r["institution_id"])
+    }
+    _lookup_store(key, result, version)
+    return result
+
+
+def list_devices(institution_id: int) -> ComboBatch:
+    key = ("devices", int(institution_id))
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return cached
+    version = lookup_version()
     with connect() as conn:
         rows = conn.execute(
             """
@@ -63,15 +170,24 @@ def list_devices(institution_id: int) -> list[ComboItem]:
             """,
             (institution_id,),
         ).fetchall()
-    return [ComboItem(int(r["id"]), str(r["name"])) for r in rows]
+    batch = _combo_batch(rows)
+    _lookup_store(key, batch, version)
+    return batch
 
 
 def list_admission_channels() -> list[ComboItem]:
+    key = ("admission_channels",)
+    cached = _lookup_cached(key)
+    if cached is not None:
+        return list(cached)
+    version = lookup_version()
     with connect() as conn:
         rows = conn.execute(
             "SELECT id, name FROM admission_channels WHERE is_active = 1 ORDER BY name"
         ).fetchall()
-    return [ComboItem(int(r["id"]), str(r["name"])) for r in rows]
+    items = tuple(ComboItem(int(r["id"]), str(r["name"])) for r in rows)
+    _lookup_store(key, items, version)
+    return list(items)
 
 
 def get_patient(patient_id: int) -> dict | None:
@@ -150,7 +266,7 @@ def upsert_patient(
         return int(cur.lastrowid)
 
 
-def list_patients_for_institution(institution_id: int, limit: int = 50) -> list[PatientListItem]:
+def list_patients_for_institution(institution_id: int, limit: int = 50, offset: int = 0) -> list[PatientListItem]:
     with connect() as conn:
         rows = conn.execute(
             """
@@ -163,10 +279,10 @@ def list_patients_for_institution(institution_id: int, limit: int = 50) -> list[
             LEFT JOIN protocols pr ON p.id = pr.patient_id
             WHERE p.institution_id = ?
             GROUP BY p.id
-            ORDER BY p.created_at DESC
-            LIMIT ?
+            ORDER BY p.created_at DESC, p.id DESC
+            LIMIT ? OFFSET ?
             """,
-            (institution_id, limit),
+            (institution_id, limit, offset),
         ).fetchall()
     return [
         PatientListItem(
@@ -296,7 +412,8 @@ def list_protocols_for_patient(patient_id: int) -> list[ProtocolListItem]:
               pr.finished_at,
               st.name AS study_name,
               pr.study_type_id,
-              pr.is_signed
+              pr.is_signed,
+              st.name || ' ' || COALESCE(pr.created_at, '') AS display_title
             FROM protocols pr
             JOIN study_types st ON st.id = pr.study_type_id
             WHERE pr.patient_id = ?
@@ -312,6 +429,7 @@ def list_protocols_for_patient(patient_id: int) -> list[ProtocolListItem]:
             study_name=str(r["study_name"]),
             study_type_id=int(r["study_type_id"]),
             is_signed=bool(r["is_signed"]),
+            display_title=str(r["display_title"]),
         )
         for r in rows
     ]
@@ -3,6 +3,7 @@ from __future__ import annotations
 from PySide6 import QtCore, QtWidgets
 
 from ..db import connect
+from ..repo import invalidate_lookup_cache
 
 
 class AdmissionChannelsDialog(QtWidgets.QDialog):
@@ -123,6 +124,7 @@ class AdmissionChannelsDialog(QtWidgets.QDialog):
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось добавить: {e}")
                 return
+        invalidate_lookup_cache()
         self._load_channels()
         self.changed.emit()
 
@@ -151,6 +153,7 @@ class AdmissionChannelsDialog(QtWidgets.QDialog):
                 (name, 1 if active else 0, ch_id),
             )
             conn.commit()
+        invalidate_lookup_cache()
         self._load_channels()
         self.changed.emit()
 
@@ -170,5 +173,6 @@ class AdmissionChannelsDialog(QtWidgets.QDialog):
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось удалить: {e}")
                 return
+        invalidate_lookup_cache()
         self._load_channels()
         self.changed.emit()
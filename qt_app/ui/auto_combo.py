@@ -214,6 +214,9 @@ class AutoComboBox(QtWidgets.QComboBox):
             if view is not None:
                 view.setAlternatingRowColors(False)
                 view.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+                # Обычные комбо — однострочные пункты: высоту строки view считает один раз, а не по каждому
+                # пункту (dict/template с переносами выключают это в _apply_view_config)
+                view.setUniformItemSizes(True)
                 # Явно наследуем шрифт (Arial 12 задаётся на QApplication, но на некоторых темах
                 # попап может взять системный).
                 view.setFont(self.font())
@@ -500,7 +503,7 @@ class AutoComboBox(QtWidgets.QComboBox):
                 if view is not None:
                     try:
                         view.setFont(QtGui.QFont("Arial", 12))
-                        view.setUniformItemSizes(False)
+                        view.setUniformItemSizes(True)
                         count = int(self.count() or 0)
                         if count > 0:
                             if self.property("popup_auto_height"):
@@ -7,9 +7,17 @@ from pathlib import Path
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..db import connect
+from ..db import close_connection, connect
 from ..paths import db_path, ultrasound_dir
-from ..repo import delete_field, delete_group, delete_patient, delete_protocol, delete_tab, delete_study_type
+from ..repo import (
+    delete_field,
+    delete_group,
+    delete_patient,
+    delete_protocol,
+    delete_tab,
+    delete_study_type,
+    invalidate_lookup_cache,
+)
 from .auto_combo import AutoComboBox
 
 
@@ -443,6 +451,7 @@ class DatabaseAdminDialog(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить изменения:\n{e}")
             return
 
+        invalidate_lookup_cache()
         QtWidgets.QMessageBox.information(self, "Успех", "Изменения сохранены.")
         self._dirty.clear()
         self._reload_page()
@@ -500,6 +509,7 @@ class DatabaseAdminDialog(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось добавить строку:\n{e}")
             return
 
+        invalidate_lookup_cache()
         self._reload_page()
 
     def _delete_row(self) -> None:
@@ -575,6 +585,7 @@ class DatabaseAdminDialog(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось удалить:\n{e}")
             return
 
+        invalidate_lookup_cache()
         self._reload_page()
 
     # ---------------- DB file operations ----------------
@@ -653,6 +664,8 @@ class DatabaseAdminDialog(QtWidgets.QDialog):
             QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось сделать автобэкап:\n{e}")
             return
 
+        # Своё соединение с текущим файлом закрываем до подмены, чтобы не писать в него потом
+        close_connection()
         try:
             shutil.copy2(srcp, db_path())
         except Exception as e:
@@ -666,6 +679,7 @@ class DatabaseAdminDialog(QtWidgets.QDialog):
             return
 
         self._db_replaced = True
+        invalidate_lookup_cache()
         msg = "База данных импортирована."
         if backup:
             msg += f"\n\nАвтобэкап:\n{backup}"
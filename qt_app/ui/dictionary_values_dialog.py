@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from dataclasses import replace
+
 from PySide6 import QtCore, QtGui, QtWidgets
 
 from ..repo import (
@@ -13,38 +15,173 @@ from ..repo import (
 from .auto_combo import WrapAnywhereDelegate
 
 
+# Один документ на модуль для замеров высоты текста (делегат и диалог работают в GUI-потоке).
+_SHARED_DOC: QtGui.QTextDocument | None = None
+
+
+def _get_shared_doc(font: QtGui.QFont) -> QtGui.QTextDocument:
+    global _SHARED_DOC
+    doc = _SHARED_DOC
+    if doc is None:
+        doc = QtGui.QTextDocument()
+        to = QtGui.QTextOption()
+        to.setWrapMode(QtGui.QTextOption.WrapMode.WordWrap)
+        to.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
+        doc.setDefaultTextOption(to)
+        _SHARED_DOC = doc
+    if doc.defaultFont() != font:
+        doc.setDefaultFont(font)
+    return doc
+
+
 class _TableWrapDelegate(WrapAnywhereDelegate):
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        # (row, col) -> (поколение, ширина, текст, размер); invalidate() сбрасывает всё разом
+        self._cache: dict[tuple[int, int], tuple[int, int, str, QtCore.QSize]] = {}
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
     def sizeHint(self, option: QtWidgets.QStyleOptionViewItem, index) -> QtCore.QSize:
         try:
-            opt = QtWidgets.QStyleOptionViewItem(option)
-            self.initStyleOption(opt, index)
-            view = opt.widget
+            view = option.widget
             if isinstance(view, QtWidgets.QTableView):
                 try:
                     width = int(view.columnWidth(index.column()))
                 except Exception:
-                    width = int(opt.rect.width() or 0)
+                    width = int(option.rect.width() or 0)
             else:
-                width = int(opt.rect.width() or 0)
+                width = int(option.rect.width() or 0)
             width = max(60, width)
-            doc = QtGui.QTextDocument()
-            doc.setDefaultFont(opt.font)
-            to = QtGui.QTextOption()
-            to.setWrapMode(QtGui.QTextOption.WrapMode.WordWrap)
-            to.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
-            doc.setDefaultTextOption(to)
+            key = (index.row(), index.column())
+            text = str(index.data(QtCore.Qt.ItemDataRole.DisplayRole) or "")
+            hit = self._cache.get(key)
+            if hit is not None and hit[0] == self._generation and hit[1] == width and hit[2] == text:
+                return QtCore.QSize(hit[3])
+            opt = QtWidgets.QStyleOptionViewItem(option)
+            self.initStyleOption(opt, index)
+            doc = _get_shared_doc(opt.font)
             doc.setPlainText(opt.text)
             doc.setTextWidth(width)
             height = int(doc.size().height()) + 6
-            line_h = opt.fontMetrics().height()
-            return QtCore.QSize(width, max(height, line_h + 6))
+            line_h = opt.fontMetrics.height()
+            size = QtCore.QSize(width, max(height, line_h + 6))
+            self._cache[key] = (self._generation, width, text, size)
+            return QtCore.QSize(size)
         except Exception:
             return super().sizeHint(option, index)
 
 
+class _DictValuesModel(QtCore.QAbstractTableModel):
+    """Значения словаря для QTableView: без QTableWidgetItem на каждую ячейку."""
+
+    _HEADERS = ("Порядок", "Значение")
+    _ALIGN = int(QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignTop)
+
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self._rows: list[DictionaryValueRow] = []
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 (Qt naming)
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 (Qt naming)
+        return 0 if parent.isValid() else 2
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        v = self._rows[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return str(v.display_order) if index.column() == 0 else v.value
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole:
+            return self._ALIGN
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return v.id
+        return None
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.ItemDataRole.DisplayRole):  # noqa: N802 (Qt naming)
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self._HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def set_rows(self, rows: list[DictionaryValueRow]) -> None:
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def row_at(self, row: int) -> DictionaryValueRow | None:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    # Точечные изменения: список строк меняется на месте (он же DictionaryValuesDialog._values).
+    def append_row(self, v: DictionaryValueRow) -> int:
+        row = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._rows.append(v)
+        self.endInsertRows()
+        return row
+
+    def replace_row(self, row: int, v: DictionaryValueRow) -> None:
+        self._rows[row] = v
+        self.dataChanged.emit(self.index(row, 0), self.index(row, 1), [QtCore.Qt.ItemDataRole.DisplayRole])
+
+    def remove_row(self, row: int) -> None:
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._rows[row]
+        self.endRemoveRows()
+
+    def move_row(self, src: int, dst: int) -> None:
+        # beginMoveRows ждёт позицию "перед которой" вставить строку
+        dest_child = dst + 1 if dst > src else dst
+        self.beginMoveRows(QtCore.QModelIndex(), src, src, QtCore.QModelIndex(), dest_child)
+        self._rows.insert(dst, self._rows.pop(src))
+        self.endMoveRows()
+
+
+class _ValueDialog(QtWidgets.QDialog):
+    def __init__(self, parent: QtWidgets.QWidget | None = None):
+        super().__init__(parent)
+        self.setMinimumWidth(520)
+        self.setMinimumHeight(220)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        form = QtWidgets.QFormLayout()
+        self.edit = QtWidgets.QPlainTextEdit()
+        self.edit.setMinimumHeight(90)
+        form.addRow("Значение:", self.edit)
+        layout.addLayout(form)
+
+        btns = QtWidgets.QHBoxLayout()
+        btns.addStretch(1)
+        ok = QtWidgets.QPushButton("OK")
+        cancel = QtWidgets.QPushButton("Отмена")
+        ok.clicked.connect(self.accept)
+        cancel.clicked.connect(self.reject)
+        btns.addWidget(ok)
+        btns.addWidget(cancel)
+        layout.addLayout(btns)
+
+    def set_default(self, title: str, text: str) -> None:
+        self.setWindowTitle(title)
+        self.edit.setPlainText(text)
+        self.edit.selectAll()
+        self.edit.setFocus()
+
+    def value(self) -> str:
+        return self.edit.toPlainText().strip()
+
+
 class DictionaryValuesDialog(QtWidgets.QDialog):
     changed = QtCore.Signal()
 
+    # Сколько строк пересчитывать за один такт цикла событий
+    _REFRESH_CHUNK = 200
+
     def __init__(self, *, field_id: int, field_name: str, parent: QtWidgets.QWidget | None = None):
         super().__init__(parent)
         self.field_id = field_id
@@ -53,6 +190,18 @@ class DictionaryValuesDialog(QtWidgets.QDialog):
         self.setModal(True)
 
         self._values: list[DictionaryValueRow] = []
+        self._value_dialog: _ValueDialog | None = None
+        # Что было при последнем пересчёте высот: при тех же ширине/числе строк и без правок пересчёт не нужен
+        self._last_col1_w: int = -1
+        self._last_row_count: int = -1
+        self._dirty = True
+        # Состояние пересчёта высот порциями (см. _continue_refresh); -1 — пересчёт не идёт.
+        # В _dirty_rows — строки, высота которых ещё не пересчитана под текущую ширину.
+        self._refresh_cursor = -1
+        self._dirty_rows: set[int] = set()
+        self._refresh_scheduled = False
+        self._refresh_text_w = 0
+        self._refresh_min_h = 0
 
         self._build_ui()
         self._reload()
@@ -83,16 +232,19 @@ class DictionaryValuesDialog(QtWidgets.QDialog):
         btns.addWidget(down_btn)
         root.addLayout(btns)
 
-        self.table = QtWidgets.QTableWidget(0, 2)
+        self._model = _DictValuesModel(self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self._model)
         table_font = self.table.font()
         table_font.setPointSize(11)
         self.table.setFont(table_font)
-        self.table.setHorizontalHeaderLabels(["Порядок", "Значение"])
         self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
         self.table.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
         self.table.setWordWrap(True)
         self.table.setTextElideMode(QtCore.Qt.TextElideMode.ElideNone)
-        self.table.setItemDelegateForColumn(1, _TableWrapDelegate(self.table))
+        self._delegate = _TableWrapDelegate(self.table)
+        self._wrap_mode = True
+        self.table.setItemDelegateForColumn(1, self._delegate)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.ResizeToContents)
         self.table.horizontalHeader().setSectionResizeMode(1, QtWidgets.QHeaderView.ResizeMode.Stretch)
@@ -104,8 +256,8 @@ class DictionaryValuesDialog(QtWidgets.QDialog):
             )
         except Exception:
             pass
-        if self.table.viewport() is not None:
-            self.table.viewport().installEventFilter(self)
+        # Недосчитанные строки, попавшие в видимую область при прокрутке, досчитываем сразу
+        self.table.verticalScrollBar().valueChanged.connect(self._on_table_scrolled)
         root.addWidget(self.table, 1)
 
         footer = QtWidgets.QHBoxLayout()
@@ -121,98 +273,199 @@ class DictionaryValuesDialog(QtWidgets.QDialog):
 
     def _reload(self) -> None:
         self._values = list_dictionary_values(self.field_id)
-        self.table.setRowCount(0)
-        for v in self._values:
-            r = self.table.rowCount()
-            self.table.insertRow(r)
-            it_order = QtWidgets.QTableWidgetItem(str(v.display_order))
-            it_order.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignTop)
-            self.table.setItem(r, 0, it_order)
-            it = QtWidgets.QTableWidgetItem(v.value)
-            it.setTextAlignment(QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignTop)
-            it.setData(QtCore.Qt.ItemDataRole.UserRole, v.id)
-            self.table.setItem(r, 1, it)
-        self._refresh_row_heights()
+        self._model.set_rows(self._values)
+        self._delegate.invalidate()
+        self._dirty = True
+        # Сначала показываем строки одной (оценочной) высоты, точные высоты — на следующем такте цикла событий
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        QtCore.QTimer.singleShot(0, self._refresh_row_heights)
 
 
+    # Фильтр на viewport нужен только пока диалог на экране
+    def showEvent(self, event: QtGui.QShowEvent) -> None:  # noqa: N802 (Qt naming)
+        self.table.viewport().installEventFilter(self)
+        super().showEvent(event)
+
+    def hideEvent(self, event: QtGui.QHideEvent) -> None:  # noqa: N802 (Qt naming)
+        self.table.viewport().removeEventFilter(self)
+        super().hideEvent(event)
+
     def eventFilter(self, obj: object, event: QtCore.QEvent) -> bool:
-        if obj is self.table.viewport() and event.type() == QtCore.QEvent.Type.Resize:
+        if event.type() != QtCore.QEvent.Type.Resize:
+            return False
+        if obj is self.table.viewport():
             QtCore.QTimer.singleShot(0, self._refresh_row_heights)
         return super().eventFilter(obj, event)
 
     def _refresh_row_heights(self) -> None:
+        col_w = int(self.table.columnWidth(1) or 0)
+        row_count = self._model.rowCount()
+        if col_w == self._last_col1_w and row_count == self._last_row_count and not self._dirty:
+            return
+        text_w = max(60, col_w)
+        fm = self.table.fontMetrics()
+        min_h = fm.height() + 6
+        # Все значения в одну строку и влезают в колонку — переносы не нужны:
+        # рисуем штатным делегатом с «…», высота строк одна и та же, QTextDocument не трогаем.
+        needs_wrap = not all(self._fits_one_line(v.value, fm, text_w) for v in self._values)
+        self._set_wrap_mode(needs_wrap)
+        if not needs_wrap:
+            self.table.verticalHeader().setDefaultSectionSize(min_h)
+        self._last_col1_w = col_w
+        self._last_row_count = row_count
+        self._dirty = False
+        # Новый проход отменяет недоделанный: сразу меряем только видимые строки,
+        # остальные помечаем «грязными» и досчитываем порциями через цикл событий.
+        self._refresh_text_w = text_w
+        self._refresh_min_h = min_h
+        self._dirty_rows = set(range(row_count))
+        self._measure_rows(self._visible_rows())
+        self._refresh_cursor = 0
+        self._schedule_refresh()
+
+    def _schedule_refresh(self) -> None:
+        if self._refresh_scheduled:
+            return
+        self._refresh_scheduled = True
+        QtCore.QTimer.singleShot(0, self._continue_refresh)
+
+    def _continue_refresh(self) -> None:
+        # Не больше _REFRESH_CHUNK строк за такт, чтобы длинный словарь не подвешивал UI
+        self._refresh_scheduled = False
+        row = self._refresh_cursor
+        if row < 0:
+            return
+        n = len(self._values)
+        batch: list[int] = []
+        while row < n and len(batch) < self._REFRESH_CHUNK:
+            if row in self._dirty_rows:
+                batch.append(row)
+            row += 1
+        self._measure_rows(batch)
+        if row < n and self._dirty_rows:
+            self._refresh_cursor = row
+            self._schedule_refresh()
+        else:
+            self._refresh_cursor = -1
+            self._dirty_rows.clear()
+
+    def _visible_rows(self) -> range:
+        n = self._model.rowCount()
+        top = self.table.rowAt(0)
+        bot = self.table.rowAt(self.table.viewport().height() - 1)
+        if top < 0:
+            top = 0
+        if bot < 0:
+            bot = n - 1
+        return range(max(0, top - 5), min(n, bot + 6))
+
+    def _on_table_scrolled(self, *_args) -> None:
+        if self._dirty_rows:
+            self._measure_rows(self._visible_rows())
+
+    def _measure_rows(self, rows) -> None:
+        rows = [row for row in rows if row in self._dirty_rows]
+        if not rows:
+            return
+        text_w = self._refresh_text_w
+        min_h = self._refresh_min_h
+        # Высоты выставляем пачкой: без перерисовки и без sectionResized на каждую строку.
+        vh = self.table.verticalHeader()
+        self.table.setUpdatesEnabled(False)
+        vh.blockSignals(True)
         try:
-            col_w = int(self.table.columnWidth(1) or 0)
-            col_w = max(60, col_w)
-            fm = self.table.fontMetrics()
-            min_h = fm.height() + 6
-            for row in range(self.table.rowCount()):
-                it = self.table.item(row, 1)
-                if it is None:
+            for row in rows:
+                self._dirty_rows.discard(row)
+                if self._wrap_mode:
+                    new_h = max(min_h, self._row_height_for_text(self._values[row].value, text_w))
+                else:
+                    new_h = min_h
+                if new_h == self.table.rowHeight(row):
                     continue
-                h = self._row_height_for_text(it.text(), col_w)
-                self.table.setRowHeight(row, max(min_h, h))
+                self.table.setRowHeight(row, new_h)
         except Exception:
             pass
+        finally:
+            vh.blockSignals(False)
+            # sectionResized был заглушён — геометрию/скроллбары view обновляем один раз сами
+            self.table.updateGeometries()
+            self.table.setUpdatesEnabled(True)
+            self.table.viewport().update()
+
+    def _refresh_row_height(self, row: int) -> None:
+        # Поменялась одна строка — пересчитываем только её, а не всю таблицу.
+        v = self._model.row_at(row)
+        if v is None:
+            return
+        text_w = max(60, int(self.table.columnWidth(1) or 0))
+        fm = self.table.fontMetrics()
+        min_h = fm.height() + 6
+        if not self._wrap_mode:
+            if not self._fits_one_line(v.value, fm, text_w):
+                # Появилось длинное значение — переключаемся на переносы для всей таблицы
+                self._dirty = True
+                self._refresh_row_heights()
+                return
+            new_h = min_h
+        else:
+            new_h = max(min_h, self._row_height_for_text(v.value, text_w))
+        self._dirty_rows.discard(row)
+        if new_h != self.table.rowHeight(row):
+            self.table.setRowHeight(row, new_h)
+        self._last_row_count = self._model.rowCount()
+
+    @staticmethod
+    def _fits_one_line(text: str, fm: QtGui.QFontMetrics, width: int) -> bool:
+        text = text or ""
+        return "\n" not in text and fm.horizontalAdvance(text) <= width - 6
+
+    def _set_wrap_mode(self, wrap: bool) -> None:
+        if wrap == self._wrap_mode:
+            return
+        self._wrap_mode = wrap
+        self.table.setWordWrap(wrap)
+        self.table.setTextElideMode(QtCore.Qt.TextElideMode.ElideNone if wrap else QtCore.Qt.TextElideMode.ElideRight)
+        self.table.setItemDelegateForColumn(1, self._delegate if wrap else None)
 
     def _row_height_for_text(self, text: str, width: int) -> int:
         try:
-            doc = QtGui.QTextDocument()
-            doc.setDefaultFont(self.table.font())
-            to = QtGui.QTextOption()
-            to.setWrapMode(QtGui.QTextOption.WrapMode.WordWrap)
-            to.setAlignment(QtCore.Qt.AlignmentFlag.AlignLeft)
-            doc.setDefaultTextOption(to)
+            doc = _get_shared_doc(self.table.font())
             doc.setPlainText(text or "")
             doc.setTextWidth(max(1, int(width) - 6))
             return int(doc.size().height()) + 6
         except Exception:
             return 24
 
+    def _current_row(self) -> int:
+        idx = self.table.currentIndex()
+        return idx.row() if idx.isValid() else -1
+
     def _current_value(self) -> DictionaryValueRow | None:
-        row = self.table.currentRow()
-        if row < 0:
-            return None
-        it = self.table.item(row, 1)
-        if not it:
-            return None
-        vid = int(it.data(QtCore.Qt.ItemDataRole.UserRole))
-        return next((x for x in self._values if x.id == vid), None)
+        # Строка модели и есть DictionaryValueRow — без поиска по id
+        return self._model.row_at(self._current_row())
 
     def _ask_value(self, *, title: str, default: str = "") -> str | None:
-        dlg = QtWidgets.QDialog(self)
-        dlg.setWindowTitle(title)
-        dlg.setMinimumWidth(520)
-        dlg.setMinimumHeight(220)
-        layout = QtWidgets.QVBoxLayout(dlg)
-
-        form = QtWidgets.QFormLayout()
-        edit = QtWidgets.QPlainTextEdit()
-        edit.setPlainText(default)
-        edit.setMinimumHeight(90)
-        form.addRow("Значение:", edit)
-        layout.addLayout(form)
-
-        btns = QtWidgets.QHBoxLayout()
-        btns.addStretch(1)
-        ok = QtWidgets.QPushButton("OK")
-        cancel = QtWidgets.QPushButton("Отмена")
-        ok.clicked.connect(dlg.accept)
-        cancel.clicked.connect(dlg.reject)
-        btns.addWidget(ok)
-        btns.addWidget(cancel)
-        layout.addLayout(btns)
-
+        # Диалог ввода строим один раз и переиспользуем для всех «Добавить»/«Изменить»
+        if self._value_dialog is None:
+            self._value_dialog = _ValueDialog(self)
+        dlg = self._value_dialog
+        dlg.set_default(title, default)
         if dlg.exec() != QtWidgets.QDialog.DialogCode.Accepted:
             return None
-        return edit.toPlainText().strip() or None
+        return dlg.value() or None
 
     def _add(self) -> None:
         val = self._ask_value(title="Добавить значение")
         if not val:
             return
-        create_dictionary_value(self.field_id, val)
-        self._reload()
+        new_id = create_dictionary_value(self.field_id, val)
+        # В БД новое значение получает MAX(display_order) + 1, т.е. встаёт в конец списка
+        order = max((v.display_order for v in self._values), default=0) + 1
+        row = self._model.append_row(
+            DictionaryValueRow(id=int(new_id), field_id=int(self.field_id), value=val, display_order=order)
+        )
+        self._refresh_row_height(row)
+        self.table.selectRow(row)
         self.changed.emit()
 
     def _edit(self) -> None:
@@ -223,7 +476,9 @@ class DictionaryValuesDialog(QtWidgets.QDialog):
         if not val:
             return
         update_dictionary_value(cur.id, val)
-        self._reload()
+        row = self._current_row()
+        self._model.replace_row(row, replace(cur, value=val))
+        self._refresh_row_height(row)
         self.changed.emit()
 
     def _delete(self) -> None:
@@ -233,14 +488,35 @@ class DictionaryValuesDialog(QtWidgets.QDialog):
         if QtWidgets.QMessageBox.question(self, "Удалить", f"Удалить значение '{cur.value}'?") != QtWidgets.QMessageBox.StandardButton.Yes:
             return
         delete_dictionary_value(cur.id)
-        self._reload()
+        row = self._current_row()
+        self._model.remove_row(row)
+        # Строки ниже удалённой сдвинулись на одну вверх
+        self._dirty_rows = {r if r < row else r - 1 for r in self._dirty_rows if r != row}
+        # и курсор досчёта тоже: иначе строка сразу за ним встала бы под курсор и была пропущена
+        if 0 <= row < self._refresh_cursor:
+            self._refresh_cursor -= 1
         self.changed.emit()
 
     def _move(self, direction: int) -> None:
         cur = self._current_value()
         if not cur:
             return
+        i = self._current_row()
+        j = i + direction
+        if j < 0 or j >= len(self._values):
+            return
         move_dictionary_value(cur.id, direction)
-        self._reload()
+        other = self._values[j]
+        if len({v.display_order for v in self._values}) != len(self._values):
+            # Есть повторяющийся display_order: после обмена порядок в БД (display_order, id)
+            # может разойтись с локальным обменом двух строк — берём актуальный список целиком
+            self._reload()
+        else:
+            # В БД строки обменялись display_order — повторяем это локально
+            self._model.replace_row(i, replace(cur, display_order=other.display_order))
+            self._model.replace_row(j, replace(other, display_order=cur.display_order))
+            self._model.move_row(i, j)
+            self._refresh_row_height(i)
+            self._refresh_row_height(j)
         self.changed.emit()
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from pathlib import Path
+import os.path
 
 from PySide6 import QtCore, QtWidgets
 
@@ -14,6 +14,7 @@ class FilePathsDialog(QtWidgets.QDialog):
         self.resize(760, 260)
         self.setModal(True)
 
+        self._loaded = ExternalFilesSettings()
         self._build_ui()
         self._load()
 
@@ -70,6 +71,7 @@ class FilePathsDialog(QtWidgets.QDialog):
 
     def _load(self) -> None:
         s = load_external_files_settings()
+        self._loaded = s
         self.help_edit.setText(s.help_path or "")
         self.service_edit.setText(s.service_path or "")
         self.about_edit.setText(s.about_path or "")
@@ -100,13 +102,15 @@ class FilePathsDialog(QtWidgets.QDialog):
             p = (p or "").strip()
             if not p:
                 return None
-            return str(Path(p))
+            return os.path.normpath(p)
 
         s = ExternalFilesSettings(
             help_path=_norm(self.help_edit.text()),
             service_path=_norm(self.service_edit.text()),
             about_path=_norm(self.about_edit.text()),
         )
-        save_external_files_settings(s)
+        # Ничего не поменяли — файл настроек не перезаписываем
+        if s != self._loaded:
+            save_external_files_settings(s)
         self.accept()
 
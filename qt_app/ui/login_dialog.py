@@ -1,13 +1,43 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from PySide6 import QtCore, QtWidgets
+from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..repo import ComboItem, list_doctors, list_institutions
-from .settings_system_dialog import SettingsSystemDialog
+from ..repo import ComboBatch, list_doctors_by_institution, list_institutions, lookup_version
 from .auto_combo import AutoComboBox
 
+if TYPE_CHECKING:
+    from .settings_system_dialog import SettingsSystemDialog
+
+
+# Стили окна входа одной таблицей на весь диалог (селекторы по objectName),
+# а не отдельным setStyleSheet на каждый виджет
+_COMBO_QSS = (
+    "QComboBox#pickerCombo { border: 1px solid #bbbbbb; border-radius: 4px; padding: 6px 8px; } "
+    "QComboBox#pickerCombo:focus, QComboBox#pickerCombo:on { border: 2px solid #007bff; padding: 5px 7px; }"
+)
+_BTN_QSS = (
+    "QPushButton#loginBtn { background: #2196F3; color: white; padding: 8px 18px; border-radius: 6px; border: 2px solid #9aa0a6; }"
+    "QPushButton#loginBtn:hover { background: #1976D2; border-color: #007bff; }"
+    "QPushButton#loginBtn:focus { border-color: #007bff; }"
+)
+_ERR_QSS = "QLabel#errorLabel { color: #b00020; }"
+_LOGIN_QSS = _COMBO_QSS + _BTN_QSS + _ERR_QSS
+
+# Жирный шрифт подписей формы: один на все подписи (Qt разделяет QFont неявно)
+_BOLD_FONT: QtGui.QFont | None = None
+
+
+def _bold_font() -> QtGui.QFont:
+    global _BOLD_FONT
+    if _BOLD_FONT is None:
+        f = QtWidgets.QApplication.font("QLabel")
+        f.setBold(True)
+        _BOLD_FONT = f
+    return _BOLD_FONT
+
 
 @dataclass(frozen=True)
 class LoginResult:
@@ -15,6 +45,54 @@ class LoginResult:
     doctor_id: int
 
 
+class _ComboBatchModel(QtCore.QAbstractListModel):
+    """Модель комбобокса прямо поверх ComboBatch: без QStandardItem на каждый пункт."""
+
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self._batch = ComboBatch()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 (Qt naming)
+        return 0 if parent.isValid() else len(self._batch)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole):
+            return self._batch.names[row]
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return int(self._batch.ids[row])
+        return None
+
+    def set_batch(self, batch: ComboBatch) -> None:
+        self.beginResetModel()
+        self._batch = batch
+        self.endResetModel()
+
+
+class _LoaderSignals(QtCore.QObject):
+    loaded = QtCore.Signal(object, object)
+    failed = QtCore.Signal(str)
+
+
+class _InstitutionsLoader(QtCore.QRunnable):
+    """Читает учреждения и их врачей в пуле потоков, чтобы запрос к БД не подвешивал окно входа."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.signals = _LoaderSignals()
+
+    def run(self) -> None:
+        try:
+            items = list_institutions()
+            doctors = list_doctors_by_institution()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.loaded.emit(items, doctors)
+
+
 class LoginDialog(QtWidgets.QDialog):
     logged_in = QtCore.Signal(LoginResult)
 
@@ -25,14 +103,26 @@ class LoginDialog(QtWidgets.QDialog):
         # По замечанию заказчика: сделать окно чуть шире/длиннее под длинные надписи и значения
         self.setMinimumWidth(420)
 
-        self._institution_items: list[ComboItem] = []
-        self._doctor_items: list[ComboItem] = []
+        self._institution_batch = ComboBatch()
+        self._doctor_batch = ComboBatch()
+        # Врачи всех учреждений, загруженные вместе со списком учреждений: смена учреждения не ходит в БД
+        self._doctors_by_inst: dict[int, ComboBatch] = {}
+        self._loader: _InstitutionsLoader | None = None
+        self._reload_pending = False
+        self._adjust_pending = False
+        # Диалог настроек строим при первом открытии и держим до закрытия окна входа
+        self._settings_dlg: SettingsSystemDialog | None = None
+        self._content_widths: dict[QtWidgets.QComboBox, int] = {}
+        # id выбранных учреждения/врача храним сами, чтобы не ходить за ними в currentData()
+        self._inst_id: int | None = None
+        self._doc_id: int | None = None
 
         self._build_ui()
         self._load_institutions()
-        QtCore.QTimer.singleShot(0, self._adjust_to_contents)
+        self._schedule_adjust()
 
     def _build_ui(self) -> None:
+        self.setStyleSheet(_LOGIN_QSS)
         root = QtWidgets.QVBoxLayout(self)
         root.setContentsMargins(18, 18, 18, 18)
         root.setSpacing(12)
@@ -63,25 +153,25 @@ class LoginDialog(QtWidgets.QDialog):
         self.doctor_combo = AutoComboBox(max_popup_items=30)
         self.institution_combo.setEditable(False)
         self.doctor_combo.setEditable(False)
-        # По ТЗ: окно входа небольшое, но текст в комбобоксах не должен обрезаться
+        # По ТЗ: окно входа небольшое, но текст в комбобоксах не должен обрезаться.
+        # Ширину под самый длинный пункт считаем сами один раз на заполнение (см. _fill_combo),
+        # а не через AdjustToContents, который обходит весь список при каждом изменении.
         for cb in (self.institution_combo, self.doctor_combo):
-            cb.setSizeAdjustPolicy(QtWidgets.QComboBox.SizeAdjustPolicy.AdjustToContents)
-            cb.currentTextChanged.connect(lambda _t=None: self._adjust_to_contents())
+            cb.setModel(_ComboBatchModel(cb))
+            cb.setSizeAdjustPolicy(QtWidgets.QComboBox.SizeAdjustPolicy.AdjustToMinimumContentsLengthWithIcon)
             # Match standard field styling (like Пол/Канал)
-            cb.setStyleSheet(
-                "QComboBox { border: 1px solid #bbbbbb; border-radius: 4px; padding: 6px 8px; } "
-                "QComboBox:focus, QComboBox:on { border: 2px solid #007bff; padding: 5px 7px; }"
-            )
+            cb.setObjectName("pickerCombo")
             cb.setProperty("no_popup_margins", True)
 
         self.institution_combo.currentIndexChanged.connect(self._on_institution_changed)
+        self.doctor_combo.currentIndexChanged.connect(self._on_doctor_changed)
 
         form.addRow(self._bold_label("Учреждение:"), self.institution_combo)
         form.addRow(self._bold_label("Врач:"), self.doctor_combo)
         root.addLayout(form)
 
         self.error_label = QtWidgets.QLabel("")
-        self.error_label.setStyleSheet("color: #b00020;")
+        self.error_label.setObjectName("errorLabel")
         self.error_label.setWordWrap(True)
         root.addWidget(self.error_label)
 
@@ -91,72 +181,143 @@ class LoginDialog(QtWidgets.QDialog):
         self.login_btn.setDefault(True)
         self.login_btn.clicked.connect(self._login)
         self.login_btn.setMinimumWidth(140)
-        self.login_btn.setStyleSheet(
-            "QPushButton { background: #2196F3; color: white; padding: 8px 18px; border-radius: 6px; border: 2px solid #9aa0a6; }"
-            "QPushButton:hover { background: #1976D2; border-color: #007bff; }"
-            "QPushButton:focus { border-color: #007bff; }"
-        )
+        self.login_btn.setObjectName("loginBtn")
         btn_row.addWidget(self.login_btn)
         btn_row.addStretch(1)
         root.addLayout(btn_row)
 
         self.settings_btn.clicked.connect(self._open_settings)
 
+    def _schedule_adjust(self) -> None:
+        # Сколько бы раз ни поменялся текст за такт (заполнение комбо, смена учреждения),
+        # пересчёт размеров и adjustSize() делаем один раз.
+        if self._adjust_pending:
+            return
+        self._adjust_pending = True
+        QtCore.QTimer.singleShot(0, self._adjust_to_contents)
+
     def _adjust_to_contents(self) -> None:
+        self._adjust_pending = False
         # Подгоняем диалог под текущие значения комбобоксов (и их sizeHint).
         try:
             min_w = max(
-                int(self.institution_combo.sizeHint().width()),
-                int(self.doctor_combo.sizeHint().width()),
+                self._content_widths.get(self.institution_combo, 0),
+                self._content_widths.get(self.doctor_combo, 0),
                 260,
             )
-            self.institution_combo.setMinimumWidth(min_w)
-            self.doctor_combo.setMinimumWidth(min_w)
+            for cb in (self.institution_combo, self.doctor_combo):
+                cb.setMinimumWidth(min_w)
+                cb.view().setMinimumWidth(min_w)
         except Exception:
             pass
         self.adjustSize()
 
     def _bold_label(self, text: str) -> QtWidgets.QLabel:
         lbl = QtWidgets.QLabel(text)
-        f = lbl.font()
-        f.setBold(True)
-        lbl.setFont(f)
+        lbl.setFont(_bold_font())
         return lbl
 
     def _load_institutions(self) -> None:
-        self._institution_items = list_institutions()
-        self.institution_combo.clear()
-        for item in self._institution_items:
-            self.institution_combo.addItem(item.name, item.id)
-
-        if self._institution_items:
-            self.institution_combo.setCurrentIndex(0)
-            self._on_institution_changed(0)
-        self._adjust_to_contents()
+        # Загрузка уже идёт — перечитаем ещё раз, когда она закончится
+        if self._loader is not None:
+            self._reload_pending = True
+            return
+        self._set_loading(True)
+        loader = _InstitutionsLoader()
+        loader.signals.loaded.connect(self._on_institutions_loaded)
+        loader.signals.failed.connect(self._on_institutions_failed)
+        self._loader = loader
+        QtCore.QThreadPool.globalInstance().start(loader)
+
+    def _set_loading(self, loading: bool) -> None:
+        for w in (self.institution_combo, self.doctor_combo, self.login_btn):
+            w.setEnabled(not loading)
+        if loading:
+            QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.CursorShape.WaitCursor)
+        else:
+            QtWidgets.QApplication.restoreOverrideCursor()
+
+    def _finish_loading(self) -> None:
+        self._loader = None
+        self._set_loading(False)
+        if self._reload_pending:
+            self._reload_pending = False
+            self._load_institutions()
+
+    @QtCore.Slot(str)
+    def _on_institutions_failed(self, message: str) -> None:
+        self.error_label.setText(f"Не удалось загрузить список учреждений: {message}")
+        self._finish_loading()
+
+    @QtCore.Slot(object, object)
+    def _on_institutions_loaded(self, batch: ComboBatch, doctors_by_inst: dict[int, ComboBatch]) -> None:
+        self._institution_batch = batch
+        self._doctors_by_inst = doctors_by_inst
+        self.setUpdatesEnabled(False)
+        try:
+            # Сигналы комбо глушим на время заполнения: иначе сброс модели и setCurrentIndex
+            # дёргают _on_institution_changed сами, а потом ещё раз вызываем его мы
+            with QtCore.QSignalBlocker(self.institution_combo):
+                self._fill_combo(self.institution_combo, self._institution_batch)
+                if self._institution_batch:
+                    self.institution_combo.setCurrentIndex(0)
+            self._on_institution_changed(self.institution_combo.currentIndex())
+        finally:
+            self.setUpdatesEnabled(True)
+        self._schedule_adjust()
+        self._finish_loading()
 
     @QtCore.Slot(int)
     def _on_institution_changed(self, index: int) -> None:
         self.error_label.setText("")
-        if index < 0 or index >= len(self._institution_items):
-            self._doctor_items = []
-            self.doctor_combo.clear()
+        if index < 0 or index >= len(self._institution_batch):
+            self._inst_id = None
+            self._doctor_batch = ComboBatch()
+            self._fill_combo(self.doctor_combo, self._doctor_batch)
+            self._on_doctor_changed(-1)
             return
 
-        inst_id = self._institution_items[index].id
-        self._doctor_items = list_doctors(inst_id)
+        inst_id = self._institution_batch.ids[index]
+        self._inst_id = inst_id
+        self._doctor_batch = self._doctors_by_inst.get(inst_id, ComboBatch())
 
-        self.doctor_combo.clear()
-        for item in self._doctor_items:
-            self.doctor_combo.addItem(item.name, item.id)
+        self._fill_combo(self.doctor_combo, self._doctor_batch)
 
-        if self._doctor_items:
+        if self._doctor_batch:
             self.doctor_combo.setCurrentIndex(0)
-        self._adjust_to_contents()
+        # После сброса модели Qt может не прислать currentIndexChanged (строка та же) — синхронизируем сами
+        self._on_doctor_changed(self.doctor_combo.currentIndex())
+        self._schedule_adjust()
+
+    @QtCore.Slot(int)
+    def _on_doctor_changed(self, index: int) -> None:
+        if 0 <= index < len(self._doctor_batch):
+            self._doc_id = self._doctor_batch.ids[index]
+        else:
+            self._doc_id = None
+
+    def _fill_combo(self, combo: QtWidgets.QComboBox, batch: ComboBatch) -> None:
+        # Один сброс модели вместо вставки по строке; после сброса combo сам выбирает первый пункт
+        combo.model().set_batch(batch)
+        self._content_widths[combo] = self._combo_width_for(combo, batch.names)
+
+    @staticmethod
+    def _combo_width_for(combo: QtWidgets.QComboBox, names: list[str]) -> int:
+        # Как QComboBox с AdjustToContents: самый длинный текст + рамка/стрелка/отступы от стиля
+        try:
+            fm = combo.fontMetrics()
+            text_w = max((fm.boundingRect(name).width() for name in names), default=0)
+            opt = QtWidgets.QStyleOptionComboBox()
+            combo.initStyleOption(opt)
+            size = combo.style().sizeFromContents(
+                QtWidgets.QStyle.ContentsType.CT_ComboBox, opt, QtCore.QSize(text_w, fm.height()), combo
+            )
+            return int(size.width())
+        except Exception:
+            return int(combo.sizeHint().width())
 
     def _current_ids(self) -> tuple[int | None, int | None, int | None]:
-        inst_id = self.institution_combo.currentData()
-        doc_id = self.doctor_combo.currentData()
-        return inst_id, doc_id, None
+        return self._inst_id, self._doc_id, None
 
     @QtCore.Slot()
     def _login(self) -> None:
@@ -171,8 +332,22 @@ class LoginDialog(QtWidgets.QDialog):
 
     @QtCore.Slot()
     def _open_settings(self) -> None:
-        dlg = SettingsSystemDialog(parent=self)
-        dlg.exec()
-        # После изменений перезагружаем список учреждений/врачей/аппаратов
-        self._load_institutions()
+        if self._settings_dlg is None:
+            # Настройки открывают редко: модуль импортируем при первом открытии, а не вместе с окном входа
+            from .settings_system_dialog import SettingsSystemDialog
+
+            self._settings_dlg = SettingsSystemDialog(parent=self)
+        version = lookup_version()
+        self._settings_dlg.exec()
+        # Перезагружаем учреждения/врачей только если справочники действительно поменяли
+        # (любая правка в настройках/админке БД сбрасывает кэш и двигает версию)
+        if lookup_version() != version:
+            self._load_institutions()
+
+    def done(self, result: int) -> None:
+        # Окно входа закрывается (вход/отмена/крестик) — отпускаем закэшированный диалог настроек
+        if self._settings_dlg is not None:
+            self._settings_dlg.deleteLater()
+            self._settings_dlg = None
+        super().done(result)
 
@@ -2,20 +2,23 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from .patient_dialog import PatientDialog
 from .protocols_list_dialog import ProtocolsListDialog
-from ..repo import list_protocols_for_patient
+from ..repo import ProtocolListItem, list_protocols_for_patient
 from .protocol_view_dialog import ProtocolViewDialog
 from .protocol_area import ProtocolArea
 from .search_dialog import SearchDialog
 from ..repo import PatientListItem, delete_patient, delete_protocol, list_patients_for_institution
 from ..paths import app_base_dir
 from ..utils.open_external import open_in_os
-from ..utils.app_settings import load_external_files_settings
-from .report_dialog import ReportDialog
+from ..utils.app_settings import ExternalFilesSettings, external_files_version, load_external_files_settings
+
+if TYPE_CHECKING:
+    from .patient_dialog import PatientDialog
+    from .report_dialog import ReportDialog
 
 
 @dataclass(frozen=True)
@@ -24,30 +27,154 @@ class Session:
     doctor_id: int
 
 
+# Вид строки и id храним в отдельных int-ролях (без кортежа ("patient", id) на каждый item)
 ROLE_KIND = int(QtCore.Qt.ItemDataRole.UserRole)
+ROLE_STUDY_TYPE_ID = int(QtCore.Qt.ItemDataRole.UserRole) + 1
+ROLE_ID = int(QtCore.Qt.ItemDataRole.UserRole) + 2
+# ФИО пациента без префикса "+ "/"- " (префикс меняется при раскрытии/сворачивании)
+ROLE_PATIENT_NAME = int(QtCore.Qt.ItemDataRole.UserRole) + 3
+KIND_PATIENT = 1
+KIND_PROTOCOL = 2
 ROLE_PROTOCOL_SELECTED = int(QtCore.Qt.ItemDataRole.UserRole) + 10
 ROLE_PATIENT_SELECTED = int(QtCore.Qt.ItemDataRole.UserRole) + 11
+ROLE_PATIENT_HIGHLIGHTED = int(QtCore.Qt.ItemDataRole.UserRole) + 12
+
+# Пациенты грузятся страницами: следующая подгружается при прокрутке списка к концу
+_PATIENTS_PAGE = 50
+
+# Кнопки Справка/Сервис/О программе: ключ пути в настройках (<ключ>_path) -> имена файлов
+# рядом с приложением, если путь не задан
+_SIDE_FILE_NAMES: dict[str, tuple[str, ...]] = {
+    "help": ("help.exe", "Справка.exe"),
+    "service": ("service.html", "service.htm", "Сервис.html", "Сервис.htm"),
+    "about": ("about.exe", "О программе.exe"),
+}
+
+# Фон строк пациентов (рисует делегат): выбранный / найденный поиском или последний добавленный / обычный
+_PATIENT_SELECTED_BG = QtGui.QColor("#FF95A8")
+_PATIENT_HIGHLIGHT_BG = QtGui.QColor("#c6dbff")
+_PATIENT_BG = QtGui.QColor("#c6dbff")
+# Фон строк протоколов: выбранный / обычный
+_PROTOCOL_SELECTED_BG = QtGui.QColor("#c6dbff")
+_PROTOCOL_BG = QtGui.QColor("#ffffff")
+# Выравнивание текста строк, которые рисует делегат
+_ITEM_TEXT_ALIGN = int(QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter)
+# Линия ручки сплиттера
+_GRIP_PEN = QtGui.QPen(QtGui.QColor("#666"), 2)
+
+# Стили левой панели (плашка с кнопками, список пациентов) одним листом на панель:
+# Qt разбирает его один раз, а не по листу на каждую кнопку/рамку/дерево.
+_PANEL_BTN_QSS = (
+    "QPushButton#addPatientBtn { background: #4CAF50; }"
+    "QPushButton#editPatientBtn { background: #FF9800; }"
+    "QPushButton#deletePatientBtn { background: #F44336; }"
+    "QPushButton#addPatientBtn, QPushButton#editPatientBtn, QPushButton#deletePatientBtn {"
+    " color: white; padding: 6px 10px; border: 2px solid #9aa0a6; border-radius: 6px; }"
+    "QPushButton#addPatientBtn:hover, QPushButton#addPatientBtn:focus,"
+    " QPushButton#editPatientBtn:hover, QPushButton#editPatientBtn:focus,"
+    " QPushButton#deletePatientBtn:hover, QPushButton#deletePatientBtn:focus { border-color: #007bff; }"
+)
+_PANEL_FRAME_QSS = (
+    "QFrame#patientsHeader, QFrame#patientsFrame { background: #f1f1f1; border: 1px solid #ddd; border-radius: 6px; }"
+    "QLabel#patientsTitle { background: transparent; border: 0; padding: 0; }"
+)
+_PATIENT_TREE_QSS = """
+    /* Прозрачный фон, чтобы был виден фон контейнера patients_frame */
+    QTreeWidget#patientTree { background: transparent; border: 0px; border-radius: 6px; }
+    QTreeWidget#patientTree::viewport { background: transparent; }
+    /* Hide default expand/collapse indicator (some themes show it as black squares).
+       Одно правило на все состояния ветки: :open/:closed/:has-children/... его наследуют */
+    QTreeView#patientTree::branch {
+      background: transparent;
+      border-image: none;
+      image: none;
+      width: 0px;
+      height: 0px;
+    }
+    /* disable "text focus rectangle" */
+    QTreeWidget#patientTree::item:focus { outline: 0; }
+    QTreeWidget#patientTree::item:selected { outline: 0; }
+    QTreeWidget#patientTree::item { outline: 0; }
+    /* patients (top-level, has children indicator); фон рисуется делегатом */
+    QTreeWidget#patientTree::item:has-children {
+      border: 0px;
+      padding: 10px;
+      margin-bottom: 2px;
+    }
+    /* protocols (children) look like "button"; фон рисуется делегатом */
+    QTreeWidget#patientTree::item:!has-children {
+      border: 0px;
+      padding: 4px 8px;
+      margin-left: 22px;
+      margin-top: 2px;
+      margin-bottom: 2px;
+    }
+"""
+_PATIENTS_PANEL_QSS = _PANEL_BTN_QSS + _PANEL_FRAME_QSS + _PATIENT_TREE_QSS
+
+_ITEM_FONTS: dict[int, QtGui.QFont] = {}
+
+
+def _item_font(point_size: int) -> QtGui.QFont:
+    # Один QFont на размер для всех строк дерева (пациенты 13pt, протоколы 10pt), а не копия на каждый item
+    f = _ITEM_FONTS.get(point_size)
+    if f is None:
+        f = QtGui.QFont()
+        f.setPointSize(point_size)
+        _ITEM_FONTS[point_size] = f
+    return f
 
 
 class _PatientProtocolDelegate(QtWidgets.QStyledItemDelegate):
-    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem, index) -> None:
-        # Важно: option.font не всегда учитывает шрифт/размер, заданный в QTreeWidgetItem.
-        # Берём "правильные" значения через initStyleOption().
-        opt = QtWidgets.QStyleOptionViewItem(option)
-        self.initStyleOption(opt, index)
+    def __init__(self, parent: QtCore.QObject | None = None) -> None:
+        super().__init__(parent)
+        # Высота строки зависит только от вида строки (пациент/протокол: свой шрифт и QSS-отступы),
+        # поэтому sizeHint считаем один раз на вид, а не для каждой строки при каждой раскладке.
+        self._size_cache: dict[bool, QtCore.QSize] = {}
+        # Жирный/обычный вариант шрифта строки: (font.key(), bold) -> QFont
+        self._font_cache: dict[tuple[str, bool], QtGui.QFont] = {}
+
+    def sizeHint(self, option: QtWidgets.QStyleOptionViewItem, index) -> QtCore.QSize:
+        # Ширина подсказки дереву не нужна (одна колонка на всю ширину) — важна только высота.
+        is_child = index.parent().isValid()
+        size = self._size_cache.get(is_child)
+        if size is None:
+            size = super().sizeHint(option, index)
+            self._size_cache[is_child] = size
+        return size
+
+    def _font_with_bold(self, font: QtGui.QFont, bold: bool) -> QtGui.QFont:
+        key = (font.key(), bold)
+        f = self._font_cache.get(key)
+        if f is None:
+            f = QtGui.QFont(font)
+            f.setBold(bold)
+            self._font_cache[key] = f
+        return f
 
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem, index) -> None:
         kind = index.data(ROLE_KIND)
-        is_patient = bool(kind and isinstance(kind, (list, tuple)) and kind[0] == "patient")
-        is_protocol = bool(kind and isinstance(kind, (list, tuple)) and kind[0] == "protocol")
+        is_patient = kind == KIND_PATIENT
+        is_protocol = kind == KIND_PROTOCOL
 
         # Рисуем фон сами (иначе QSS/QStyle затирает заливку).
         if is_patient or is_protocol:
+            # Важно: option.font не всегда учитывает шрифт/размер, заданный в QTreeWidgetItem.
+            # Берём "правильные" значения через initStyleOption().
+            opt = QtWidgets.QStyleOptionViewItem(option)
+            self.initStyleOption(opt, index)
+
             painter.save()
             painter.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
             rect = option.rect.adjusted(1, 1, -1, -1)
 
             if is_patient:
-                bg = QtGui.QColor("#FF95A8") if bool(index.data(ROLE_PATIENT_SELECTED)) else QtGui.QColor("#c6dbff")
+                if bool(index.data(ROLE_PATIENT_SELECTED)):
+                    bg = _PATIENT_SELECTED_BG
+                elif bool(index.data(ROLE_PATIENT_HIGHLIGHTED)):
+                    bg = _PATIENT_HIGHLIGHT_BG
+                else:
+                    bg = _PATIENT_BG
                 painter.setPen(QtCore.Qt.PenStyle.NoPen)
                 painter.setBrush(bg)
                 painter.drawRoundedRect(rect, 6, 6)
@@ -56,31 +183,75 @@ class _PatientProtocolDelegate(QtWidgets.QStyledItemDelegate):
                 # Протоколы: фон не на всю строку — начинаем там, где "плашка" (отступ как в примере).
                 left_pad = 22
                 box = rect.adjusted(left_pad, 0, 0, 0)
-                bg = QtGui.QColor("#c6dbff") if bool(index.data(ROLE_PROTOCOL_SELECTED)) else QtGui.QColor("#ffffff")
+                bg = _PROTOCOL_SELECTED_BG if bool(index.data(ROLE_PROTOCOL_SELECTED)) else _PROTOCOL_BG
                 painter.setPen(QtCore.Qt.PenStyle.NoPen)
                 painter.setBrush(bg)
                 painter.drawRoundedRect(box, 6, 6)
                 text_rect = box.adjusted(8, 0, -8, 0)
 
             # Текст
-            font = QtGui.QFont(opt.font)
+            font = opt.font
             if is_patient:
-                # По ТЗ/скрину: выбранный пациент — жирным
-                font.setBold(bool(index.data(ROLE_PATIENT_SELECTED)))
+                # По ТЗ/скрину: выбранный пациент — жирным (копия шрифта только если жирность другая)
+                bold = bool(index.data(ROLE_PATIENT_SELECTED))
+                if font.bold() != bold:
+                    font = self._font_with_bold(font, bold)
             painter.setFont(font)
             painter.setPen(opt.palette.color(QtGui.QPalette.ColorRole.Text))
             text = str(opt.text or "")
-            painter.drawText(
-                text_rect,
-                int(QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter),
-                text,
-            )
+            painter.drawText(text_rect, _ITEM_TEXT_ALIGN, text)
             painter.restore()
             return
 
         super().paint(painter, option, index)
 
 
+class _ProtocolsLoaderSignals(QtCore.QObject):
+    loaded = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, str)
+
+
+class _ProtocolsLoader(QtCore.QRunnable):
+    """Читает протоколы пациента в пуле потоков, чтобы раскрытие пациента не подвешивало окно."""
+
+    def __init__(self, patient_id: int) -> None:
+        super().__init__()
+        self.patient_id = patient_id
+        self.signals = _ProtocolsLoaderSignals()
+
+    def run(self) -> None:
+        try:
+            protocols = list_protocols_for_patient(self.patient_id)
+        except Exception as e:
+            self.signals.failed.emit(self.patient_id, str(e))
+            return
+        self.signals.loaded.emit(self.patient_id, protocols)
+
+
+class _PatientsLoaderSignals(QtCore.QObject):
+    loaded = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, str)
+
+
+class _PatientsLoader(QtCore.QRunnable):
+    """Первичная загрузка списка пациентов в пуле потоков: окно показывается, не дожидаясь БД."""
+
+    def __init__(self, generation: int, institution_id: int) -> None:
+        super().__init__()
+        self.generation = generation
+        self.institution_id = institution_id
+        self.signals = _PatientsLoaderSignals()
+
+    def run(self) -> None:
+        try:
+            # Один запрос: пациенты вместе с признаком has_protocols
+            patients = list_patients_for_institution(self.institution_id, limit=_PATIENTS_PAGE)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.loaded.emit(self.generation, patients)
+
+
 class _GripSplitterHandle(QtWidgets.QSplitterHandle):
     """
     Визуально показывает маленькую "ручку" (грип) по центру, вместо полосы на всю высоту.
@@ -112,8 +283,7 @@ class _GripSplitterHandle(QtWidgets.QSplitterHandle):
         # Вертикальная линия
         r = self.rect()
         cx = r.center().x()
-        line_color = QtGui.QColor("#666")
-        painter.setPen(QtGui.QPen(line_color, 2))
+        painter.setPen(_GRIP_PEN)
         painter.drawLine(int(cx), r.top(), int(cx), r.bottom())
 
 
@@ -134,7 +304,38 @@ class MainWindow(QtWidgets.QMainWindow):
         self._patients: list[PatientListItem] = []
         self._selected_patient_id: int | None = None
         self._selected_protocol_item: QtWidgets.QTreeWidgetItem | None = None
-        self._search_highlight_ids: set[int] = set()
+        self._search_highlight_ids: frozenset[int] = frozenset()
+        # id пациентов, у которых есть протоколы (has_protocols из того же запроса, что и список)
+        self._patients_with_protocols: set[int] = set()
+        # patient_id -> строка пациента в дереве (пересобирается вместе с деревом в _set_patients)
+        self._patient_items: dict[int, QtWidgets.QTreeWidgetItem] = {}
+        # Последнее применённое оформление списка: (выбранный id, подсвеченные id)
+        self._patient_styles: tuple[int | None, frozenset[int]] | None = None
+        # Последняя загруженная страница была полной — в БД могут быть ещё пациенты
+        self._patients_has_more = False
+        # Номер последней загрузки списка: ответ фоновой загрузки, обогнанный синхронным
+        # _reload_patients (добавление/удаление до прихода ответа), отбрасываем
+        self._patients_generation = 0
+        self._patients_loader: _PatientsLoader | None = None
+        # Файлы рядом с приложением (имя в casefold -> путь) для кнопок Справка/Сервис/О программе
+        self._side_files: dict[str, Path] | None = None
+        # Пути к этим файлам из настроек: (версия настроек, значения); перечитываем только после сохранения
+        self._ext_files: tuple[int, ExternalFilesSettings] | None = None
+        # Идущие загрузки протоколов: patient_id -> loader (держим ссылку, пока не придёт ответ)
+        self._protocol_loaders: dict[int, _ProtocolsLoader] = {}
+        # Уже прочитанные протоколы: patient_id -> список (повторное раскрытие без запроса в БД)
+        self._protocol_cache: dict[int, list[ProtocolListItem]] = {}
+        # Пациенты, чьи протоколы изменились, пока шла их загрузка: ответ такой загрузки
+        # устарел — в кэш его не кладём, а читаем протоколы заново
+        self._protocols_stale: set[int] = set()
+        # Фоновая подгрузка протоколов в кэш после построения списка: очередь patient_id
+        # и пациент, чьи протоколы сейчас подгружаются (по одному за раз)
+        self._prefetch_queue: list[int] = []
+        self._prefetch_patient_id: int | None = None
+        # Диалоги строим при первом открытии и дальше переиспользуем (reset() перед каждым показом)
+        self._patient_dlg: PatientDialog | None = None
+        self._search_dlg: SearchDialog | None = None
+        self._report_dlg: ReportDialog | None = None
 
         splitter = _GripSplitter(QtCore.Qt.Orientation.Horizontal)
         splitter.setChildrenCollapsible(False)
@@ -142,6 +343,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # ===== Left: patients list =====
         left = QtWidgets.QWidget()
+        left.setStyleSheet(_PATIENTS_PANEL_QSS)
         # По ТЗ/скрину: левая часть чуть шире, чтобы кнопки не налезали
         left.setMinimumWidth(420)
         left_layout = QtWidgets.QVBoxLayout(left)
@@ -150,7 +352,7 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Header plaque: title + buttons in one block (как на скрине)
         header = QtWidgets.QFrame()
-        header.setStyleSheet("QFrame { background: #f1f1f1; border: 1px solid #ddd; border-radius: 6px; }")
+        header.setObjectName("patientsHeader")
         header_layout = QtWidgets.QVBoxLayout(header)
         # Чуть больше внутренние отступы, чтобы рамки кнопок (border) не "упирались" в рамку группы.
         header_layout.setContentsMargins(12, 12, 12, 12)
@@ -162,7 +364,7 @@ class MainWindow(QtWidgets.QMainWindow):
         f.setBold(True)
         title.setFont(f)
         title.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
-        title.setStyleSheet("background: transparent; border: 0; padding: 0;")
+        title.setObjectName("patientsTitle")
         header_layout.addWidget(title)
 
         btn_row = QtWidgets.QHBoxLayout()
@@ -171,29 +373,20 @@ class MainWindow(QtWidgets.QMainWindow):
         # Центрируем блок кнопок, но сами кнопки не растягиваем
         btn_row.addStretch(1)
         self.add_patient_btn = QtWidgets.QPushButton("Добавить")
-        self.add_patient_btn.setStyleSheet(
-            "QPushButton { background: #4CAF50; color: white; padding: 6px 10px; border: 2px solid #9aa0a6; border-radius: 6px; }"
-            "QPushButton:hover, QPushButton:focus { border-color: #007bff; }"
-        )
+        self.add_patient_btn.setObjectName("addPatientBtn")
         # При расширении левой панели кнопки не должны растягиваться
         self.add_patient_btn.setSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
         self.add_patient_btn.clicked.connect(self._add_patient)
         btn_row.addWidget(self.add_patient_btn)
 
         self.edit_patient_btn = QtWidgets.QPushButton("Изменить")
-        self.edit_patient_btn.setStyleSheet(
-            "QPushButton { background: #FF9800; color: white; padding: 6px 10px; border: 2px solid #9aa0a6; border-radius: 6px; }"
-            "QPushButton:hover, QPushButton:focus { border-color: #007bff; }"
-        )
+        self.edit_patient_btn.setObjectName("editPatientBtn")
         self.edit_patient_btn.setSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
         self.edit_patient_btn.clicked.connect(self._edit_patient)
         btn_row.addWidget(self.edit_patient_btn)
 
         self.delete_patient_btn = QtWidgets.QPushButton("Удалить")
-        self.delete_patient_btn.setStyleSheet(
-            "QPushButton { background: #F44336; color: white; padding: 6px 10px; border: 2px solid #9aa0a6; border-radius: 6px; }"
-            "QPushButton:hover, QPushButton:focus { border-color: #007bff; }"
-        )
+        self.delete_patient_btn.setObjectName("deletePatientBtn")
         self.delete_patient_btn.setSizePolicy(QtWidgets.QSizePolicy.Policy.Fixed, QtWidgets.QSizePolicy.Policy.Fixed)
         self.delete_patient_btn.clicked.connect(self._delete_patient)
         btn_row.addWidget(self.delete_patient_btn)
@@ -205,12 +398,13 @@ class MainWindow(QtWidgets.QMainWindow):
         # Patient list with expandable protocols (по просьбе: клик по ФИО раскрывает протоколы снизу)
         patients_frame = QtWidgets.QFrame()
         # Фон контейнера списка пациентов — как у плашки с кнопками в окне протокола
-        patients_frame.setStyleSheet("QFrame { background: #f1f1f1; border: 1px solid #ddd; border-radius: 6px; }")
+        patients_frame.setObjectName("patientsFrame")
         patients_layout = QtWidgets.QVBoxLayout(patients_frame)
         patients_layout.setContentsMargins(6, 6, 6, 6)
         patients_layout.setSpacing(0)
 
         self.patient_tree = QtWidgets.QTreeWidget()
+        self.patient_tree.setObjectName("patientTree")
         self.patient_tree.setHeaderHidden(True)
         self.patient_tree.setItemsExpandable(True)
         # По ТЗ: перед ФИО должен быть "+" / "-" (а не стандартная стрелка дерева)
@@ -225,60 +419,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.patient_tree.itemCollapsed.connect(self._on_patient_tree_collapsed)
         self.patient_tree.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
         self.patient_tree.customContextMenuRequested.connect(self._on_patient_tree_context_menu)
+        self.patient_tree.verticalScrollBar().valueChanged.connect(self._on_patient_tree_scrolled)
         # По просьбе: клик по пустому месту в списке пациентов должен "снимать" пациента справа.
         self.patient_tree.viewport().installEventFilter(self)
-        self.patient_tree.setStyleSheet(
-            """
-            /* Прозрачный фон, чтобы был виден фон контейнера patients_frame */
-            QTreeWidget { background: transparent; border: 0px; }
-            QTreeWidget::viewport { background: transparent; }
-            /* Hide default expand/collapse indicator (some themes show it as black squares) */
-            QTreeView::branch {
-              background: transparent;
-              border-image: none;
-              image: none;
-              width: 0px;
-              height: 0px;
-            }
-            QTreeView::branch:open,
-            QTreeView::branch:closed,
-            QTreeView::branch:has-children,
-            QTreeView::branch:has-children:open,
-            QTreeView::branch:has-children:closed,
-            QTreeView::branch:has-siblings:open,
-            QTreeView::branch:has-siblings:closed,
-            QTreeView::branch:has-siblings:has-children:open,
-            QTreeView::branch:has-siblings:has-children:closed {
-              background: transparent;
-              border-image: none;
-              image: none;
-            }
-            /* disable "text focus rectangle" */
-            QTreeWidget::item:focus { outline: 0; }
-            QTreeWidget::item:selected { outline: 0; }
-            QTreeWidget::item { outline: 0; }
-            /* patients (top-level, has children indicator) */
-            QTreeWidget::item:has-children {
-              border: 0px;
-              padding: 10px;
-              margin-bottom: 2px;
-            }
-            QTreeWidget::item:has-children:hover {
-              /* фон рисуется делегатом; hover оставляем пустым */
-            }
-            /* protocols (children) look like "button", highlight only on hover */
-            QTreeWidget::item:!has-children {
-              border: 0px;
-              padding: 4px 8px;
-              margin-left: 22px;
-              margin-top: 2px;
-              margin-bottom: 2px;
-            }
-            QTreeWidget::item:!has-children:hover {
-              /* фон рисуется делегатом; hover оставляем пустым */
-            }
-            """
-        )
         self.patient_tree.setItemDelegate(_PatientProtocolDelegate(self.patient_tree))
         patients_layout.addWidget(self.patient_tree, 1)
         left_layout.addWidget(patients_frame, 1)
@@ -303,7 +446,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.protocol_area.service_requested.connect(self._open_service)
         self.protocol_area.about_requested.connect(self._open_about)
         self.protocol_area.report_requested.connect(self._open_report)
-        self.protocol_area.protocol_saved.connect(self._on_protocol_saved)
+        # Очередью: список слева перестраиваем после того, как ProtocolArea закончит сохранение/построение
+        # протокола, а не посреди него (сигнал шлётся из середины _start/_save)
+        self.protocol_area.protocol_saved.connect(
+            self._on_protocol_saved, QtCore.Qt.ConnectionType.QueuedConnection
+        )
         right_layout.addWidget(self.protocol_area, 1)
 
         splitter.addWidget(right)
@@ -317,7 +464,7 @@ class MainWindow(QtWidgets.QMainWindow):
         outer.addWidget(splitter, 1)
         self.setCentralWidget(central)
 
-        self._reload_patients()
+        self._load_patients_async()
         self._refresh_buttons()
 
     def eventFilter(self, obj: object, event: QtCore.QEvent) -> bool:
@@ -328,9 +475,14 @@ class MainWindow(QtWidgets.QMainWindow):
                 and event.type() == QtCore.QEvent.Type.MouseButtonPress
                 and isinstance(event, QtGui.QMouseEvent)
             ):
-                pos = event.position().toPoint()
-                it = self.patient_tree.itemAt(pos)
-                if it is None:
+                # Снимаем выбор только левой кнопкой; правая — для контекстного меню протоколов
+                if event.button() != QtCore.Qt.MouseButton.LeftButton:
+                    return super().eventFilter(obj, event)
+                # indexAt: достаточно знать, есть ли строка под курсором, сам item не нужен
+                if not self.patient_tree.indexAt(event.position().toPoint()).isValid():
+                    # Уже ничего не выбрано и справа пусто — сбрасывать нечего
+                    if self._selected_patient_id is None and self.protocol_area.patient_id is None:
+                        return True
                     self.patient_tree.clearSelection()
                     self.patient_tree.setCurrentItem(None)
                     self._selected_patient_id = None
@@ -343,9 +495,23 @@ class MainWindow(QtWidgets.QMainWindow):
             pass
         return super().eventFilter(obj, event)
 
+    def _patient_dialog(self, patient_id: int | None = None) -> PatientDialog:
+        if self._patient_dlg is None:
+            # Модуль диалога импортируем при первом открытии, а не вместе с главным окном
+            from .patient_dialog import PatientDialog
+
+            self._patient_dlg = PatientDialog(
+                institution_id=self.session.institution_id,
+                patient_id=patient_id,
+                parent=self,
+            )
+        else:
+            self._patient_dlg.reset(patient_id=patient_id)
+        return self._patient_dlg
+
     @QtCore.Slot()
     def _add_patient(self) -> None:
-        dlg = PatientDialog(institution_id=self.session.institution_id, parent=self)
+        dlg = self._patient_dialog()
         if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             self._reload_patients(select_last_added=True)
 
@@ -354,12 +520,10 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self._selected_patient_id:
             QtWidgets.QMessageBox.warning(self, "Внимание", "Выберите пациента для редактирования.")
             return
-        dlg = PatientDialog(
-            institution_id=self.session.institution_id,
-            patient_id=self._selected_patient_id,
-            parent=self,
-        )
+        dlg = self._patient_dialog(self._selected_patient_id)
         if dlg.exec() == QtWidgets.QDialog.DialogCode.Accepted:
+            # ФИО/пол могли измениться — правая панель должна перечитать их при следующем выборе
+            self.protocol_area.forget_patient(self._selected_patient_id)
             self._reload_patients(select_patient_id=self._selected_patient_id)
 
     @QtCore.Slot()
@@ -386,7 +550,9 @@ class MainWindow(QtWidgets.QMainWindow):
             QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось удалить пациента: {e}")
             return
 
+        self.protocol_area.forget_patient(self._selected_patient_id)
         self._selected_patient_id = None
+        self.protocol_area.set_patient(None)
         self._reload_patients()
 
     def _reload_patients(
@@ -395,8 +561,56 @@ class MainWindow(QtWidgets.QMainWindow):
         select_patient_id: int | None = None,
         select_last_added: bool = False,
     ) -> None:
-        self._patients = list_patients_for_institution(self.session.institution_id, limit=50)
-        self.patient_tree.clear()
+        self._patients_generation += 1
+        # Перечитываем столько, сколько уже было подгружено прокруткой, чтобы список не "схлопывался"
+        limit = max(_PATIENTS_PAGE, len(self._patients))
+        patients = list_patients_for_institution(self.session.institution_id, limit=limit)
+        self._patients_has_more = len(patients) >= limit
+        self._set_patients(
+            patients,
+            select_patient_id=select_patient_id,
+            select_last_added=select_last_added,
+        )
+
+    def _load_patients_async(self) -> None:
+        self._patients_generation += 1
+        loader = _PatientsLoader(self._patients_generation, self.session.institution_id)
+        loader.signals.loaded.connect(self._on_patients_loaded)
+        loader.signals.failed.connect(self._on_patients_failed)
+        self._patients_loader = loader
+        QtCore.QThreadPool.globalInstance().start(loader)
+
+    def _patients_loader_finished(self, generation: int) -> None:
+        # Отпускаем загрузчик и тогда, когда его ответ устарел (список уже перечитан
+        # синхронно): иначе _fetch_more_patients считал бы, что загрузка всё ещё идёт
+        loader = self._patients_loader
+        if loader is not None and loader.generation == generation:
+            self._patients_loader = None
+
+    @QtCore.Slot(int, object)
+    def _on_patients_loaded(self, generation: int, patients: list[PatientListItem]) -> None:
+        self._patients_loader_finished(generation)
+        if generation != self._patients_generation:
+            return
+        self._patients_has_more = len(patients) >= _PATIENTS_PAGE
+        self._set_patients(patients)
+
+    @QtCore.Slot(int, str)
+    def _on_patients_failed(self, generation: int, message: str) -> None:
+        self._patients_loader_finished(generation)
+        if generation != self._patients_generation:
+            return
+        QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить список пациентов: {message}")
+
+    def _set_patients(
+        self,
+        patients: list[PatientListItem],
+        *,
+        select_patient_id: int | None = None,
+        select_last_added: bool = False,
+    ) -> None:
+        self._patients = patients
+        self._patients_with_protocols = {p.id for p in self._patients if p.has_protocols}
         self._selected_protocol_item = None
 
         last_added_id: int | None = None
@@ -406,26 +620,98 @@ class MainWindow(QtWidgets.QMainWindow):
         if select_patient_id:
             self._selected_patient_id = int(select_patient_id)
 
-        for p in self._patients:
+        # selection: list is ordered by created_at desc, so [0] is most recent
+        current_id = int(select_patient_id) if select_patient_id else last_added_id
+
+        # Пересборка списка одним проходом: без перерисовок и сигналов на каждый добавленный item;
+        # item для выделения запоминаем прямо при построении
+        tree = self.patient_tree
+        tree.setUpdatesEnabled(False)
+        tree.blockSignals(True)
+        try:
+            tree.clear()
+            self._patient_items = {}
+            self._patient_styles = None
+            current = self._add_patient_items(self._patients, current_id=current_id)
+        finally:
+            tree.blockSignals(False)
+            tree.setUpdatesEnabled(True)
+
+        if current is not None:
+            tree.setCurrentItem(current)
+        # Кэш протоколов переживает перестроение списка — выбрасываем только пропавших пациентов
+        self._protocol_cache = {
+            pid: protocols for pid, protocols in self._protocol_cache.items() if pid in self._patient_items
+        }
+        self._apply_patient_item_styles(last_added_id=last_added_id)
+        self._refresh_buttons()
+        # Новый список — новая очередь (старая отменяется)
+        self._prefetch_queue = [p.id for p in self._patients if p.has_protocols]
+        QtCore.QTimer.singleShot(0, self._prefetch_next_protocols)
+
+    def _add_patient_items(
+        self, patients: list[PatientListItem], *, current_id: int | None = None
+    ) -> QtWidgets.QTreeWidgetItem | None:
+        patient_font = _item_font(13)
+        current: QtWidgets.QTreeWidgetItem | None = None
+        items: list[QtWidgets.QTreeWidgetItem] = []
+        for p in patients:
             it = QtWidgets.QTreeWidgetItem([f"+ {p.full_name}"])
-            it.setData(0, QtCore.Qt.ItemDataRole.UserRole, ("patient", p.id))
+            it.setData(0, ROLE_KIND, KIND_PATIENT)
+            it.setData(0, ROLE_ID, p.id)
+            it.setData(0, ROLE_PATIENT_NAME, p.full_name)
             # Должно быть раскрываемо (протоколы подгружаем по клику). Сам индикатор ветки скрываем стилем.
             it.setChildIndicatorPolicy(QtWidgets.QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
-            it.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter)
-            f = it.font(0)
-            f.setPointSize(13)
-            it.setFont(0, f)
+            # Выравнивание не задаём: текст пациентов/протоколов рисует делегат (AlignLeft | AlignVCenter)
+            it.setFont(0, patient_font)
 
-            self.patient_tree.addTopLevelItem(it)
+            items.append(it)
+            self._patient_items[p.id] = it
+            if p.id == current_id:
+                current = it
+        # Одной вставкой в модель вместо addTopLevelItem на каждого пациента
+        self.patient_tree.addTopLevelItems(items)
+        return current
 
-        # selection
-        if select_patient_id:
-            self._select_patient_by_id(select_patient_id)
-        elif select_last_added and self._patients:
-            # list is ordered by created_at desc, so [0] is most recent
-            self._select_patient_by_id(self._patients[0].id)
-        self._apply_patient_item_styles(last_added_id=last_added_id)
-        self._refresh_buttons()
+    @QtCore.Slot(int)
+    def _on_patient_tree_scrolled(self, value: int) -> None:
+        # Подгружаем следующую страницу, когда до конца списка осталось меньше половины экрана
+        sb = self.patient_tree.verticalScrollBar()
+        if self._patients_has_more and sb.maximum() - value <= sb.pageStep() // 2:
+            self._fetch_more_patients()
+
+    def _fetch_more_patients(self) -> None:
+        # Пока идёт первичная фоновая загрузка, список ещё не построен
+        if self._patients_loader is not None:
+            return
+        more = list_patients_for_institution(
+            self.session.institution_id,
+            limit=_PATIENTS_PAGE,
+            offset=len(self._patients),
+        )
+        self._patients_has_more = len(more) >= _PATIENTS_PAGE
+        # Пациент мог быть добавлен/удалён после загрузки первой страницы — дубли по id пропускаем
+        more = [p for p in more if p.id not in self._patient_items]
+        if not more:
+            return
+        self._patients = self._patients + more
+        self._patients_with_protocols.update(p.id for p in more if p.has_protocols)
+
+        tree = self.patient_tree
+        tree.setUpdatesEnabled(False)
+        tree.blockSignals(True)
+        try:
+            self._add_patient_items(more)
+        finally:
+            tree.blockSignals(False)
+            tree.setUpdatesEnabled(True)
+        for p in more:
+            it = self._patient_items[p.id]
+            selected = self._selected_patient_id is not None and p.id == int(self._selected_patient_id)
+            it.setData(0, ROLE_PATIENT_SELECTED, selected)
+            it.setData(0, ROLE_PATIENT_HIGHLIGHTED, not selected and p.id in self._search_highlight_ids)
+        self._prefetch_queue.extend(p.id for p in more if p.has_protocols)
+        QtCore.QTimer.singleShot(0, self._prefetch_next_protocols)
 
     def _apply_patient_item_styles(self, *, last_added_id: int | None = None) -> None:
         """
@@ -433,35 +719,36 @@ class MainWindow(QtWidgets.QMainWindow):
 
         Требование: выбранный пациент отображается жирным.
         Поиск/последний добавленный могут подсвечиваться фоном, но жирность остаётся только у выбранного.
+        Шрифт и фон item'ам не задаём: делегат рисует их по флагам ROLE_PATIENT_SELECTED/ROLE_PATIENT_HIGHLIGHTED.
         """
-        search_bg = QtGui.QColor("#c6dbff")
-        search_fg = QtGui.QColor("#000000")
+        # Все условия подсветки сводим к одному множеству до цикла: в цикле — одно сравнение и один `in`
+        hl_ids = self._search_highlight_ids
+        if last_added_id is not None:
+            hl_ids = hl_ids | {int(last_added_id)}
+        selected_id = int(self._selected_patient_id) if self._selected_patient_id is not None else None
+
+        # Флаги переписываем только у пациентов, чьё состояние могло измениться с прошлого раза;
+        # после перестроения списка (_patient_styles = None) — у всех
+        prev = self._patient_styles
+        if prev is None:
+            ids = self._patient_items.keys()
+        else:
+            prev_selected_id, prev_hl_ids = prev
+            ids = (prev_hl_ids ^ hl_ids) | {prev_selected_id, selected_id}
+        self._patient_styles = (selected_id, hl_ids)
+        if not ids:
+            return
 
-        for i in range(self.patient_tree.topLevelItemCount()):
-            it = self.patient_tree.topLevelItem(i)
-            tag = it.data(0, QtCore.Qt.ItemDataRole.UserRole)
-            if not tag or tag[0] != "patient":
-                continue
-            pid = int(tag[1])
-
-            # base font (not bold)
-            f = it.font(0)
-            f.setBold(False)
-            it.setFont(0, f)
-            it.setBackground(0, QtGui.QBrush())
-            it.setForeground(0, QtGui.QBrush())
-            it.setData(0, ROLE_PATIENT_SELECTED, False)
-
-            if self._selected_patient_id is not None and pid == int(self._selected_patient_id):
-                f2 = it.font(0)
-                f2.setBold(True)
-                it.setFont(0, f2)
-                it.setData(0, ROLE_PATIENT_SELECTED, True)
+        # id берём из словаря, а не из data() каждого topLevelItem
+        items = self._patient_items
+        for pid in ids:
+            it = items.get(pid)
+            if it is None:
                 continue
-
-            if pid in self._search_highlight_ids or (last_added_id is not None and pid == int(last_added_id)):
-                it.setBackground(0, search_bg)
-                it.setForeground(0, search_fg)
+            selected = pid == selected_id
+            highlighted = not selected and pid in hl_ids
+            it.setData(0, ROLE_PATIENT_SELECTED, selected)
+            it.setData(0, ROLE_PATIENT_HIGHLIGHTED, highlighted)
         try:
             self.patient_tree.viewport().update()
         except Exception:
@@ -486,22 +773,29 @@ class MainWindow(QtWidgets.QMainWindow):
             pass
 
     def _select_patient_by_id(self, patient_id: int) -> QtWidgets.QTreeWidgetItem | None:
-        for i in range(self.patient_tree.topLevelItemCount()):
-            it = self.patient_tree.topLevelItem(i)
-            tag = it.data(0, QtCore.Qt.ItemDataRole.UserRole)
-            if tag and tag[0] == "patient" and int(tag[1]) == int(patient_id):
-                self.patient_tree.setCurrentItem(it)
-                return it
-        return None
+        it = self._find_patient_item(patient_id)
+        if it is not None:
+            self.patient_tree.setCurrentItem(it)
+        return it
+
+    def _find_patient_item(self, patient_id: int) -> QtWidgets.QTreeWidgetItem | None:
+        return self._patient_items.get(int(patient_id))
 
     @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
     def _on_patient_tree_clicked(self, item: QtWidgets.QTreeWidgetItem, _col: int) -> None:
-        tag = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
-        if not tag:
-            return
-        kind, idv = tag
-        if kind == "patient":
-            pid = int(idv)
+        kind = item.data(0, ROLE_KIND)
+        if kind == KIND_PATIENT:
+            pid = item.data(0, ROLE_ID)
+            if (
+                pid == self._selected_patient_id
+                and pid == self.protocol_area.patient_id
+                and self._selected_protocol_item is None
+                and self.protocol_area.is_idle()
+            ):
+                # Повторный клик по уже выбранному пациенту при пустой правой панели: сбрасывать нечего,
+                # только раскрываем/сворачиваем. Начатый (несохранённый) протокол клик по-прежнему сбрасывает.
+                self._toggle_protocol_children(item, pid)
+                return
             self._selected_patient_id = pid
             self._clear_protocol_selected()
             self.protocol_area.set_patient(pid)
@@ -509,13 +803,13 @@ class MainWindow(QtWidgets.QMainWindow):
             self._refresh_buttons()
             # По ТЗ: клик раскрывает/сворачивает протоколы (как "+" / "-")
             self._toggle_protocol_children(item, pid)
-        elif kind == "protocol":
+        elif kind == KIND_PROTOCOL:
             # Clicking protocol opens it in the right pane (ProtocolArea) instead of a separate window.
             parent = item.parent()
             if not parent:
                 return
-            pid = int(parent.data(0, QtCore.Qt.ItemDataRole.UserRole)[1])
-            proto_id = int(idv)
+            pid = parent.data(0, ROLE_ID)
+            proto_id = item.data(0, ROLE_ID)
             if proto_id <= 0:
                 QtWidgets.QMessageBox.information(self, "Протоколы", "Нет протокола")
                 # keep patient selected
@@ -524,7 +818,7 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.protocol_area.set_patient(pid)
                 self._refresh_buttons()
             else:
-                st_id = int(item.data(0, QtCore.Qt.ItemDataRole.UserRole + 1) or 0)
+                st_id = int(item.data(0, ROLE_STUDY_TYPE_ID) or 0)
                 self._selected_patient_id = pid
                 self.protocol_area.set_patient(pid)
                 self._refresh_buttons()
@@ -543,20 +837,16 @@ class MainWindow(QtWidgets.QMainWindow):
         item = self.patient_tree.itemAt(pos)
         if not item:
             return
-        tag = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
-        if not tag:
-            return
-        kind, idv = tag
-        if kind != "protocol":
+        if item.data(0, ROLE_KIND) != KIND_PROTOCOL:
             return
-        proto_id = int(idv)
+        proto_id = item.data(0, ROLE_ID)
         if proto_id <= 0:
             return
 
         parent = item.parent()
         if not parent:
             return
-        pid = int(parent.data(0, QtCore.Qt.ItemDataRole.UserRole)[1])
+        pid = parent.data(0, ROLE_ID)
 
         menu = QtWidgets.QMenu(self)
         act_del = menu.addAction("Удалить протокол…")
@@ -582,6 +872,7 @@ class MainWindow(QtWidgets.QMainWindow):
             return
 
         # обновляем список
+        self._drop_protocol_cache(int(pid))
         self._reload_patients(select_patient_id=pid)
         pit = self._select_patient_by_id(pid)
         if pit:
@@ -589,86 +880,179 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @QtCore.Slot(QtWidgets.QTreeWidgetItem, int)
     def _on_patient_tree_double_clicked(self, item: QtWidgets.QTreeWidgetItem, _col: int) -> None:
-        tag = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
-        if not tag:
-            return
-        kind, idv = tag
-        if kind == "patient":
+        if item.data(0, ROLE_KIND) == KIND_PATIENT:
             # double click on patient edits
-            pid = int(idv)
-            self._selected_patient_id = pid
+            self._selected_patient_id = item.data(0, ROLE_ID)
             self._edit_patient()
 
     def _toggle_protocol_children(self, patient_item: QtWidgets.QTreeWidgetItem, patient_id: int) -> None:
-        # If already populated, just toggle expanded
-        if patient_item.childCount() > 0 and patient_item.child(0).data(0, QtCore.Qt.ItemDataRole.UserRole):
+        # Протоколы уже грузятся — клик просто раскрывает/сворачивает строку с "Загрузка…"
+        if patient_id in self._protocol_loaders:
+            if patient_item.childCount() == 0:
+                self._set_protocol_children(patient_item, None)
             patient_item.setExpanded(not patient_item.isExpanded())
             self._set_patient_prefix(patient_item)
             return
 
-        # Populate children
-        patient_item.takeChildren()
-        protocols = list_protocols_for_patient(patient_id)
-        if not protocols:
-            ch = QtWidgets.QTreeWidgetItem(["Нет протокола"])
-            ch.setData(0, QtCore.Qt.ItemDataRole.UserRole, ("protocol", 0))
-            ch.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter)
-            f = ch.font(0)
-            f.setPointSize(10)
-            ch.setFont(0, f)
-            patient_item.addChild(ch)
-        else:
-            for pr in protocols:
-                title = f"{pr.study_name} {pr.created_at}"
-                ch = QtWidgets.QTreeWidgetItem([title])
-                ch.setData(0, QtCore.Qt.ItemDataRole.UserRole, ("protocol", pr.id))
-                ch.setData(0, QtCore.Qt.ItemDataRole.UserRole + 1, int(pr.study_type_id))
-                ch.setTextAlignment(0, QtCore.Qt.AlignmentFlag.AlignLeft | QtCore.Qt.AlignmentFlag.AlignVCenter)
-                f = ch.font(0)
-                f.setPointSize(10)
-                ch.setFont(0, f)
-                patient_item.addChild(ch)
+        # If already populated, just toggle expanded. Заглушек у пациентов нет (стрелку даёт ShowIndicator),
+        # а "Загрузка…" бывает только пока идёт загрузка — значит, любые дети здесь уже протоколы.
+        if patient_item.childCount() > 0:
+            patient_item.setExpanded(not patient_item.isExpanded())
+            self._set_patient_prefix(patient_item)
+            return
+
+        # Протоколов нет (известно из списка пациентов) — в БД не ходим, сразу показываем "Нет протокола"
+        if patient_id not in self._patients_with_protocols:
+            self._set_protocol_children(patient_item, [])
+            patient_item.setExpanded(True)
+            self._set_patient_prefix(patient_item)
+            return
+
+        # Протоколы уже читали — берём из кэша
+        cached = self._protocol_cache.get(int(patient_id))
+        if cached is not None:
+            self._set_protocol_children(patient_item, cached)
+            patient_item.setExpanded(True)
+            self._set_patient_prefix(patient_item)
+            return
+
+        # Populate children: пока протоколы читаются в фоне, показываем одну строку "Загрузка…"
+        self._start_protocols_loader(patient_id)
+
+        self._set_protocol_children(patient_item, None)
         patient_item.setExpanded(True)
         self._set_patient_prefix(patient_item)
 
+    def _drop_protocol_cache(self, patient_id: int) -> None:
+        self._protocol_cache.pop(patient_id, None)
+        if patient_id in self._protocol_loaders:
+            self._protocols_stale.add(patient_id)
+
+    def _start_protocols_loader(self, patient_id: int) -> None:
+        loader = _ProtocolsLoader(int(patient_id))
+        loader.signals.loaded.connect(self._on_protocols_loaded)
+        loader.signals.failed.connect(self._on_protocols_failed)
+        self._protocol_loaders[int(patient_id)] = loader
+        QtCore.QThreadPool.globalInstance().start(loader)
+
+    @QtCore.Slot()
+    def _prefetch_next_protocols(self) -> None:
+        # Пока пользователь смотрит на список, по одному читаем протоколы пациентов в кэш,
+        # чтобы раскрытие было мгновенным
+        if self._prefetch_patient_id is not None:
+            return
+        while self._prefetch_queue:
+            pid = self._prefetch_queue.pop(0)
+            if pid in self._protocol_cache or pid in self._protocol_loaders or pid not in self._patient_items:
+                continue
+            self._prefetch_patient_id = pid
+            self._start_protocols_loader(pid)
+            return
+
+    def _prefetch_done(self, patient_id: int) -> None:
+        if patient_id == self._prefetch_patient_id:
+            self._prefetch_patient_id = None
+            QtCore.QTimer.singleShot(0, self._prefetch_next_protocols)
+
+    def _set_protocol_children(
+        self,
+        patient_item: QtWidgets.QTreeWidgetItem,
+        protocols: list[ProtocolListItem] | None,
+    ) -> None:
+        """Заменяет детей пациента на протоколы; protocols=None — строка-заглушка "Загрузка…"."""
+        protocol_font = _item_font(10)
+        tree = self.patient_tree
+        tree.setUpdatesEnabled(False)
+        tree.blockSignals(True)
+        try:
+            patient_item.takeChildren()
+            children: list[QtWidgets.QTreeWidgetItem] = []
+            if protocols is None:
+                # Без ROLE_KIND: такой ребёнок считается заглушкой (клик по нему ничего не делает)
+                ch = QtWidgets.QTreeWidgetItem(["Загрузка…"])
+                ch.setFont(0, protocol_font)
+                children.append(ch)
+            elif not protocols:
+                ch = QtWidgets.QTreeWidgetItem(["Нет протокола"])
+                ch.setData(0, ROLE_KIND, KIND_PROTOCOL)
+                ch.setData(0, ROLE_ID, 0)
+                ch.setFont(0, protocol_font)
+                children.append(ch)
+            else:
+                for pr in protocols:
+                    ch = QtWidgets.QTreeWidgetItem([pr.display_title])
+                    ch.setData(0, ROLE_KIND, KIND_PROTOCOL)
+                    ch.setData(0, ROLE_ID, pr.id)
+                    ch.setData(0, ROLE_STUDY_TYPE_ID, int(pr.study_type_id))
+                    ch.setFont(0, protocol_font)
+                    children.append(ch)
+            # Одной вставкой в модель вместо addChild на каждую строку
+            patient_item.addChildren(children)
+        finally:
+            tree.blockSignals(False)
+            tree.setUpdatesEnabled(True)
+
+    @QtCore.Slot(int, object)
+    def _on_protocols_loaded(self, patient_id: int, protocols: list[ProtocolListItem]) -> None:
+        self._protocol_loaders.pop(patient_id, None)
+        self._prefetch_done(patient_id)
+        if patient_id in self._protocols_stale:
+            # Запрос ушёл до сохранения/удаления протокола — перечитываем; "Загрузка…" остаётся
+            self._protocols_stale.discard(patient_id)
+            self._start_protocols_loader(patient_id)
+            return
+        self._protocol_cache[patient_id] = protocols
+        # Список мог перестроиться, пока шёл запрос: ищем строку пациента заново по id.
+        # Строки ставим, только если их ждут ("Загрузка…"); иначе протоколы возьмутся из кэша при раскрытии.
+        item = self._find_patient_item(patient_id)
+        if item is None or item.childCount() == 0:
+            return
+        self._set_protocol_children(item, protocols)
+
+    @QtCore.Slot(int, str)
+    def _on_protocols_failed(self, patient_id: int, message: str) -> None:
+        self._protocol_loaders.pop(patient_id, None)
+        self._prefetch_done(patient_id)
+        if patient_id in self._protocols_stale:
+            self._protocols_stale.discard(patient_id)
+            self._start_protocols_loader(patient_id)
+            return
+        item = self._find_patient_item(patient_id)
+        if item is None or item.childCount() == 0:
+            # Раскрытия никто не ждёт (фоновая подгрузка или список перестроен) — молча;
+            # при раскрытии протоколы прочитаются заново
+            return
+        item.takeChildren()
+        item.setExpanded(False)
+        self._set_patient_prefix(item)
+        QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось загрузить протоколы: {message}")
+
     @QtCore.Slot(QtWidgets.QTreeWidgetItem)
     def _on_patient_tree_expanded(self, item: QtWidgets.QTreeWidgetItem) -> None:
         # Пользователь может нажать на стрелочку раскрытия, не кликая по ФИО.
         # В этом случае тоже подгружаем протоколы.
-        tag = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
-        if not tag:
+        if item.data(0, ROLE_KIND) != KIND_PATIENT:
             return
-        kind, idv = tag
-        if kind != "patient":
-            return
-        pid = int(idv)
-        # If placeholder or empty, populate
-        if item.childCount() == 0 or (item.childCount() == 1 and not item.child(0).data(0, QtCore.Qt.ItemDataRole.UserRole)):
+        pid = item.data(0, ROLE_ID)
+        # If empty, populate (если протоколы уже грузятся — просто ждём ответа)
+        if item.childCount() == 0 and pid not in self._protocol_loaders:
             self._toggle_protocol_children(item, pid)
         self._set_patient_prefix(item)
 
     @QtCore.Slot(QtWidgets.QTreeWidgetItem)
     def _on_patient_tree_collapsed(self, item: QtWidgets.QTreeWidgetItem) -> None:
-        tag = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
-        if not tag:
-            return
-        kind, _idv = tag
-        if kind != "patient":
+        if item.data(0, ROLE_KIND) != KIND_PATIENT:
             return
         self._set_patient_prefix(item)
 
     def _set_patient_prefix(self, item: QtWidgets.QTreeWidgetItem) -> None:
-        tag = item.data(0, QtCore.Qt.ItemDataRole.UserRole)
-        if not tag or tag[0] != "patient":
-            return
-        name = str(item.text(0) or "")
-        # strip existing prefix if any
-        for pref in ("+ ", "- ", "− "):
-            if name.startswith(pref):
-                name = name[len(pref) :]
-                break
-        prefix = "- " if item.isExpanded() else "+ "
-        item.setText(0, prefix + name)
+        name = item.data(0, ROLE_PATIENT_NAME)
+        if name is None:
+            return
+        text = ("- " if item.isExpanded() else "+ ") + name
+        # setText без изменения текста всё равно дёргает dataChanged и перерисовку строки
+        if text != item.text(0):
+            item.setText(0, text)
 
     def _refresh_buttons(self) -> None:
         enabled = self._selected_patient_id is not None
@@ -678,14 +1062,39 @@ class MainWindow(QtWidgets.QMainWindow):
     @QtCore.Slot(int)
     def _on_protocol_saved(self, patient_id: int) -> None:
         # после сохранения протокола в БД у пациента появится [+]
-        self._reload_patients(select_patient_id=patient_id)
+        pid = int(patient_id)
+        # Идущая загрузка протоколов этого пациента (раскрытие или фоновая подгрузка) вернёт
+        # список без нового протокола — _drop_protocol_cache помечает её, и ответ перечитается
+        self._drop_protocol_cache(pid)
+        item = self._find_patient_item(pid)
+        if item is None:
+            self._reload_patients(select_patient_id=pid)
+            return
+
+        # Остальной список не меняется — перечитываем только протоколы этого пациента
+        self._patients_with_protocols.add(pid)
+        self._selected_patient_id = pid
+        self._clear_protocol_selected()
+        self.patient_tree.setCurrentItem(item)
+        if pid not in self._protocol_loaders:
+            item.takeChildren()
+            if item.isExpanded():
+                self._toggle_protocol_children(item, pid)
+            else:
+                self._set_patient_prefix(item)
+        self._apply_patient_item_styles()
+        self._refresh_buttons()
 
     @QtCore.Slot()
     def _open_search(self) -> None:
-        dlg = SearchDialog(institution_id=self.session.institution_id, parent=self)
+        if self._search_dlg is None:
+            self._search_dlg = SearchDialog(institution_id=self.session.institution_id, parent=self)
+        else:
+            self._search_dlg.reset()
+        dlg = self._search_dlg
         if dlg.exec() != QtWidgets.QDialog.DialogCode.Accepted or dlg.result is None:
             return
-        self._search_highlight_ids = set(dlg.result.patient_ids)
+        self._search_highlight_ids = frozenset(dlg.result.patient_ids)
         # reload list to apply highlight, and select first match if present
         if dlg.result.patient_ids:
             pid = int(dlg.result.patient_ids[0])
@@ -701,38 +1110,69 @@ class MainWindow(QtWidgets.QMainWindow):
         self.logout_requested.emit()
         self.close()
 
-    def _open_help(self) -> None:
-        s = load_external_files_settings()
-        if s.help_path and Path(s.help_path).exists():
-            open_in_os(Path(s.help_path))
+    def _external_files(self) -> ExternalFilesSettings:
+        version = external_files_version()
+        if self._ext_files is None or self._ext_files[0] != version:
+            self._ext_files = (version, load_external_files_settings())
+        return self._ext_files[1]
+
+    @QtCore.Slot(str)
+    def _open_side(self, key: str) -> None:
+        path = getattr(self._external_files(), f"{key}_path")
+        if path and Path(path).exists():
+            open_in_os(Path(path))
             return
-        self._open_side_file(preferred_names=["help.exe", "Справка.exe"])
+        self._open_side_file(preferred_names=list(_SIDE_FILE_NAMES[key]))
+
+    # Слоты кнопок — тонкие обёртки над _open_side: имена файлов и пути в _SIDE_FILE_NAMES/настройках
+    @QtCore.Slot()
+    def _open_help(self) -> None:
+        self._open_side("help")
 
+    @QtCore.Slot()
     def _open_service(self) -> None:
-        s = load_external_files_settings()
-        if s.service_path and Path(s.service_path).exists():
-            open_in_os(Path(s.service_path))
-            return
-        self._open_side_file(preferred_names=["service.html", "service.htm", "Сервис.html", "Сервис.htm"])
+        self._open_side("service")
 
+    @QtCore.Slot()
     def _open_about(self) -> None:
-        s = load_external_files_settings()
-        if s.about_path and Path(s.about_path).exists():
-            open_in_os(Path(s.about_path))
-            return
-        self._open_side_file(preferred_names=["about.exe", "О программе.exe"])
+        self._open_side("about")
 
+    @QtCore.Slot()
     def _open_report(self) -> None:
-        dlg = ReportDialog(institution_id=self.session.institution_id, parent=self)
-        dlg.exec()
+        if self._report_dlg is None:
+            # Отчёты открывают редко: модуль импортируем при первом открытии
+            from .report_dialog import ReportDialog
+
+            self._report_dlg = ReportDialog(institution_id=self.session.institution_id, parent=self)
+        else:
+            self._report_dlg.reset()
+        self._report_dlg.exec()
+
+    def _find_side_file(self, base: Path, preferred_names: list[str]) -> Path | None:
+        # Папку читаем один раз за сессию, дальше — поиск по словарю вместо exists() на каждое имя.
+        # casefold: на Windows имена файлов регистронезависимы, как и было с exists().
+        if self._side_files is None:
+            try:
+                self._side_files = {p.name.casefold(): p for p in base.iterdir() if p.is_file()}
+            except OSError:
+                self._side_files = {}
+        for name in preferred_names:
+            p = self._side_files.get(name.casefold())
+            if p is not None:
+                return p
+        return None
 
     def _open_side_file(self, preferred_names: list[str]) -> None:
         base = app_base_dir()
-        for name in preferred_names:
-            p = base / name
-            if p.exists():
-                open_in_os(p)
-                return
+        cached = self._side_files is not None
+        p = self._find_side_file(base, preferred_names)
+        if p is None and cached:
+            # Файл могли положить уже после первого открытия — перечитываем папку один раз
+            self._side_files = None
+            p = self._find_side_file(base, preferred_names)
+        if p is not None:
+            open_in_os(p)
+            return
 
         QtWidgets.QMessageBox.information(
             self,
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import calendar
 import re
 import sqlite3
 from dataclasses import dataclass
@@ -8,16 +7,41 @@ from datetime import date
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from ..repo import ComboItem, get_patient, list_admission_channels, upsert_patient
-from .admission_channels_dialog import AdmissionChannelsDialog
+from ..repo import ComboItem, get_patient, list_admission_channels, lookup_version, upsert_patient
 from .auto_combo import AutoComboBox
 
+# Всё, что не цифра (ИИН храним только цифрами)
+_IIN_NONDIGIT_RE = re.compile(r"\D")
+
+
+# Шрифт подписей «Ф.И.О.:», «Возраст:» и т.п.: строим один раз, а не копией lbl.font() на каждую
+_BOLD_FONT: QtGui.QFont | None = None
+
+
+def _bold_font() -> QtGui.QFont:
+    global _BOLD_FONT
+    if _BOLD_FONT is None:
+        f = QtWidgets.QApplication.font("QLabel")
+        f.setBold(True)
+        _BOLD_FONT = f
+    return _BOLD_FONT
+
+
+# Дней в месяце невисокосного года (февраль високосного — в _last_day)
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
 
 @dataclass(frozen=True)
 class PatientDialogResult:
     patient_id: int
 
 
+def _last_day(year: int, month: int) -> int:
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
 def _calc_age_parts(birth: date, today: date) -> tuple[int, int, int]:
     if birth > today:
         return -1, -1, -1
@@ -32,7 +56,7 @@ def _calc_age_parts(birth: date, today: date) -> tuple[int, int, int]:
             prev_year, prev_month = today.year - 1, 12
         else:
             prev_year, prev_month = today.year, today.month - 1
-        last_day_prev_month = calendar.monthrange(prev_year, prev_month)[1]
+        last_day_prev_month = _last_day(prev_year, prev_month)
         days += last_day_prev_month
 
     if months < 0:
@@ -42,14 +66,48 @@ def _calc_age_parts(birth: date, today: date) -> tuple[int, int, int]:
     return years, months, days
 
 
-def _year_word_ru(years: int) -> str:
-    if years % 10 == 1 and years % 100 != 11:
+def _year_word_rule(n: int) -> str:
+    if n % 10 == 1 and n % 100 != 11:
         return "год"
-    if years % 10 in (2, 3, 4) and years % 100 not in (12, 13, 14):
+    if n % 10 in (2, 3, 4) and n % 100 not in (12, 13, 14):
         return "года"
     return "лет"
 
 
+# Форма слова «год» зависит только от двух последних цифр: считаем один раз на все 100
+_YEAR_WORD_TABLE = tuple(_year_word_rule(n) for n in range(100))
+
+
+def _year_word_ru(years: int) -> str:
+    return _YEAR_WORD_TABLE[years % 100]
+
+
+class _ComboItemsModel(QtCore.QAbstractListModel):
+    """Модель комбобокса поверх списка ComboItem: перезаполнение одним сбросом модели."""
+
+    def __init__(self, parent: QtCore.QObject | None = None):
+        super().__init__(parent)
+        self._items: list[ComboItem] = []
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # noqa: N802 (Qt naming)
+        return 0 if parent.isValid() else len(self._items)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        item = self._items[index.row()]
+        if role in (QtCore.Qt.ItemDataRole.DisplayRole, QtCore.Qt.ItemDataRole.EditRole):
+            return item.name
+        if role == QtCore.Qt.ItemDataRole.UserRole:
+            return item.id
+        return None
+
+    def set_items(self, items: list[ComboItem]) -> None:
+        self.beginResetModel()
+        self._items = items
+        self.endResetModel()
+
+
 class PatientDialog(QtWidgets.QDialog):
     saved = QtCore.Signal(PatientDialogResult)
 
@@ -70,8 +128,20 @@ class PatientDialog(QtWidgets.QDialog):
         self._build_ui()
         self._load_channels()
         self._load_patient_if_needed()
-        self._refresh_age()
-        self._refresh_save_state()
+        self._do_refresh()
+
+    def reset(self, *, patient_id: int | None = None) -> None:
+        """Подготовить уже построенное окно к повторному показу (добавление или другой пациент)."""
+        self.patient_id = patient_id
+        self.title_label.setText(
+            "Редактирование пациента" if self.patient_id else "Добавление нового пациента"
+        )
+        self.save_btn.setText("Изменить" if self.patient_id else "Добавить")
+        self._clear()
+        # Каналы могли измениться в настройках между показами
+        self._load_channels()
+        self._load_patient_if_needed()
+        self._do_refresh()
 
     def _build_ui(self) -> None:
         self.setWindowTitle("Данные пациента")
@@ -79,6 +149,13 @@ class PatientDialog(QtWidgets.QDialog):
         self.resize(620, 360)
         self.setMinimumWidth(620)
 
+        # Возраст и доступность "Добавить/Изменить" пересчитываем по последнему событию ввода,
+        # а не на каждую клавишу/шаг даты (не чаще раза в 40 мс)
+        self._refresh_timer = QtCore.QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(40)
+        self._refresh_timer.timeout.connect(self._do_refresh)
+
         root = QtWidgets.QVBoxLayout(self)
         root.setContentsMargins(18, 18, 18, 18)
         root.setSpacing(12)
@@ -88,14 +165,14 @@ class PatientDialog(QtWidgets.QDialog):
         self.error_label.setStyleSheet("color: #b00020;")
 
         header = QtWidgets.QHBoxLayout()
-        title = QtWidgets.QLabel(
+        self.title_label = QtWidgets.QLabel(
             "Редактирование пациента" if self.patient_id else "Добавление нового пациента"
         )
-        f = title.font()
+        f = self.title_label.font()
         f.setPointSize(12)
         f.setBold(True)
-        title.setFont(f)
-        header.addWidget(title)
+        self.title_label.setFont(f)
+        header.addWidget(self.title_label)
         header.addStretch(1)
 
         self.channel_settings_btn = QtWidgets.QToolButton()
@@ -137,9 +214,8 @@ class PatientDialog(QtWidgets.QDialog):
         self.exam_time = QtWidgets.QTimeEdit()
         self.exam_time.setDisplayFormat("HH:mm")
         _dt_line_edit_padding(self.exam_time)
-        now = QtCore.QDateTime.currentDateTime()
-        self.exam_date.setDate(now.date())
-        self.exam_time.setTime(now.time())
+        self.exam_date.setDate(QtCore.QDate.currentDate())
+        self.exam_time.setTime(QtCore.QTime.currentTime())
 
         dt_row = QtWidgets.QHBoxLayout()
         dt_row.setContentsMargins(0, 0, 0, 0)
@@ -160,7 +236,7 @@ class PatientDialog(QtWidgets.QDialog):
         self.name_edit.setStyleSheet("font-family: Arial; font-size: 13pt;")
         self.name_edit.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
         self.name_edit.setMinimumHeight(input_h)
-        self.name_edit.textChanged.connect(self._refresh_save_state)
+        self.name_edit.textChanged.connect(self._schedule_refresh)
         form.addRow(_form_label("Ф.И.О. пациента:"), self.name_edit)
 
         # IIN
@@ -176,7 +252,7 @@ class PatientDialog(QtWidgets.QDialog):
         self.iin_edit.setInputMethodHints(QtCore.Qt.InputMethodHint.ImhDigitsOnly)
         self.iin_edit.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
         self.iin_edit.setMinimumHeight(input_h)
-        self.iin_edit.textChanged.connect(self._refresh_save_state)
+        self.iin_edit.textChanged.connect(self._schedule_refresh)
         form.addRow(_form_label("ИИН:"), self.iin_edit)
 
         # Birth date
@@ -194,7 +270,7 @@ class PatientDialog(QtWidgets.QDialog):
         # "Пустая" дата = 01.01.1900; без фокуса показываем ДД.ММ.ГГГГ вместо 01.01.1900.
         self.birth_date.setDate(self._birth_min_date)
         self.birth_date.setKeyboardTracking(True)
-        self.birth_date.dateChanged.connect(lambda _d: (self._refresh_age(), self._refresh_save_state()))
+        self.birth_date.dateChanged.connect(self._schedule_refresh)
         if self.birth_date.lineEdit():
             le = self.birth_date.lineEdit()
             le.installEventFilter(self)
@@ -237,12 +313,14 @@ class PatientDialog(QtWidgets.QDialog):
         self.gender_combo.addItem("жен.", "жен")
         self.gender_combo.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
         self.gender_combo.setMinimumHeight(input_h)
-        self.gender_combo.currentIndexChanged.connect(self._refresh_save_state)
+        self.gender_combo.currentIndexChanged.connect(self._schedule_refresh)
         self._setup_combo_placeholder(self.gender_combo)
         form.addRow(_form_label("Пол:"), self.gender_combo)
 
         # Admission channel
         self.channel_combo = AutoComboBox(max_popup_items=30)
+        self._channel_model = _ComboItemsModel(self.channel_combo)
+        self.channel_combo.setModel(self._channel_model)
         try:
             _v = self.channel_combo.view()
             if _v is not None:
@@ -255,7 +333,7 @@ class PatientDialog(QtWidgets.QDialog):
         )
         self.channel_combo.setSizePolicy(QtWidgets.QSizePolicy.Policy.Expanding, QtWidgets.QSizePolicy.Policy.Fixed)
         self.channel_combo.setMinimumHeight(input_h)
-        self.channel_combo.currentIndexChanged.connect(self._refresh_save_state)
+        self.channel_combo.currentIndexChanged.connect(self._schedule_refresh)
         self._setup_combo_placeholder(self.channel_combo)
         form.addRow(_form_label("Канал поступления:"), self.channel_combo)
 
@@ -294,23 +372,26 @@ class PatientDialog(QtWidgets.QDialog):
 
     def _bold_label(self, text: str) -> QtWidgets.QLabel:
         lbl = QtWidgets.QLabel(text)
-        f = lbl.font()
-        f.setBold(True)
-        lbl.setFont(f)
+        lbl.setFont(_bold_font())
         return lbl
 
     def _load_channels(self) -> None:
         self._channel_items = list_admission_channels()
-        self.channel_combo.clear()
-        for item in self._channel_items:
-            self.channel_combo.addItem(item.name, item.id)
+        # Один сброс модели вместо clear() и addItem на каждый канал
+        self._channel_model.set_items(self._channel_items)
         self.channel_combo.setCurrentIndex(-1)
 
     @QtCore.Slot()
     def _open_channel_settings(self) -> None:
+        # Настройки каналов нужны редко: модуль импортируем только по нажатию шестерёнки
+        from .admission_channels_dialog import AdmissionChannelsDialog
+
         dlg = AdmissionChannelsDialog(parent=self)
+        version = lookup_version()
         dlg.exec()
-        self._load_channels()
+        # Список перечитываем, только если каналы действительно правили (правка сдвигает версию справочников)
+        if lookup_version() != version:
+            self._load_channels()
 
     def _load_patient_if_needed(self) -> None:
         if not self.patient_id:
@@ -320,44 +401,52 @@ class PatientDialog(QtWidgets.QDialog):
             self.error_label.setText("Пациент не найден (возможно, удалён).")
             return
 
-        self.name_edit.setText(str(data.get("full_name") or ""))
-
-        iin = data.get("iin")
-        if iin:
-            self.iin_edit.setText(str(iin))
-        else:
-            self.iin_edit.clear()
-
-        birth_iso = data.get("birth_date")
-        if birth_iso:
-            try:
-                y, m, d = map(int, str(birth_iso).split("-"))
-                self.birth_date.setDate(QtCore.QDate(y, m, d))
-            except Exception:
-                pass
-        else:
-            self.birth_date.setDate(self._birth_min_date)
-
-        gender = data.get("gender")
-        if gender in ("муж", "жен"):
-            idx = self.gender_combo.findData(gender)
-            if idx >= 0:
-                self.gender_combo.setCurrentIndex(idx)
-        if gender not in ("муж", "жен"):
-            self.gender_combo.setCurrentIndex(-1)
-
-        ac_id = data.get("admission_channel_id")
-        if ac_id:
-            idx = self.channel_combo.findData(int(ac_id))
-            if idx >= 0:
-                self.channel_combo.setCurrentIndex(idx)
-        if not ac_id:
-            self.channel_combo.setCurrentIndex(-1)
+        # Поля заполняем без сигналов: каждый лишь перезапускал бы таймер пересчёта,
+        # а пересчёт вызывающий делает сам (_do_refresh) после загрузки
+        fields = (self.name_edit, self.iin_edit, self.birth_date, self.gender_combo, self.channel_combo)
+        for w in fields:
+            w.blockSignals(True)
+        try:
+            self.name_edit.setText(str(data.get("full_name") or ""))
+
+            iin = data.get("iin")
+            if iin:
+                self.iin_edit.setText(str(iin))
+            else:
+                self.iin_edit.clear()
+
+            birth_iso = data.get("birth_date")
+            if birth_iso:
+                try:
+                    y, m, d = map(int, str(birth_iso).split("-"))
+                    self.birth_date.setDate(QtCore.QDate(y, m, d))
+                except Exception:
+                    pass
+            else:
+                self.birth_date.setDate(self._birth_min_date)
+
+            gender = data.get("gender")
+            if gender in ("муж", "жен"):
+                idx = self.gender_combo.findData(gender)
+                if idx >= 0:
+                    self.gender_combo.setCurrentIndex(idx)
+            if gender not in ("муж", "жен"):
+                self.gender_combo.setCurrentIndex(-1)
+
+            ac_id = data.get("admission_channel_id")
+            if ac_id:
+                idx = self.channel_combo.findData(int(ac_id))
+                if idx >= 0:
+                    self.channel_combo.setCurrentIndex(idx)
+            if not ac_id:
+                self.channel_combo.setCurrentIndex(-1)
+        finally:
+            for w in fields:
+                w.blockSignals(False)
 
         # Set current datetime (UX)
-        now = QtCore.QDateTime.currentDateTime()
-        self.exam_date.setDate(now.date())
-        self.exam_time.setTime(now.time())
+        self.exam_date.setDate(QtCore.QDate.currentDate())
+        self.exam_time.setTime(QtCore.QTime.currentTime())
 
     def _birth_date_is_set(self) -> bool:
         qd = self.birth_date.date()
@@ -388,10 +477,19 @@ class PatientDialog(QtWidgets.QDialog):
         self.gender_combo.setCurrentIndex(-1)
         self.channel_combo.setCurrentIndex(-1)
 
-        now = QtCore.QDateTime.currentDateTime()
-        self.exam_date.setDate(now.date())
-        self.exam_time.setTime(now.time())
+        self.exam_date.setDate(QtCore.QDate.currentDate())
+        self.exam_time.setTime(QtCore.QTime.currentTime())
 
+        self._do_refresh()
+
+    @QtCore.Slot()
+    def _schedule_refresh(self) -> None:
+        self._refresh_timer.start()
+
+    @QtCore.Slot()
+    def _do_refresh(self) -> None:
+        # Вызывается и напрямую (после загрузки/очистки формы) — отложенный пересчёт тогда не нужен
+        self._refresh_timer.stop()
         self._refresh_age()
         self._refresh_save_state()
 
@@ -416,9 +514,9 @@ class PatientDialog(QtWidgets.QDialog):
             can = False
 
         # IIN: по ТЗ строго 12 цифр (обязательное поле)
+        # Валидатор пропускает только цифры, так что хватает длины и isdigit (без regex на каждую клавишу)
         iin_raw = self.iin_edit.text()
-        iin_digits = re.sub(r"\D", "", iin_raw)
-        if len(iin_digits) != 12:
+        if len(iin_raw) != 12 or not iin_raw.isdigit():
             can = False
 
         self.save_btn.setEnabled(can)
@@ -507,7 +605,9 @@ class PatientDialog(QtWidgets.QDialog):
             self.birth_date.setFocus()
             return
 
-        iin_digits = re.sub(r"\D", "", self.iin_edit.text())
+        iin_raw = self.iin_edit.text()
+        # Валидатор пропускает только цифры; regex — на случай текста, поставленного в обход него
+        iin_digits = iin_raw if iin_raw.isdigit() else _IIN_NONDIGIT_RE.sub("", iin_raw)
         iin: str | None
         if len(iin_digits) != 12:
             self.error_label.setText("ИИН должен содержать ровно 12 цифр.")
@@ -520,7 +620,7 @@ class PatientDialog(QtWidgets.QDialog):
         if birth > date.today():
             self.error_label.setText("Дата рождения не может быть в будущем.")
             return
-        birth_iso = f"{birth.year:04d}-{birth.month:02d}-{birth.day:02d}"
+        birth_iso = birth.isoformat()
 
         ch_id = self.channel_combo.currentData()
         admission_channel_id = int(ch_id) if ch_id else None
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import traceback
+from collections import OrderedDict
 
 from PySide6 import QtCore, QtGui, QtWidgets
 
@@ -12,6 +13,9 @@ from .auto_combo import AutoComboBox
 
 
 class ProtocolArea(QtWidgets.QWidget):
+    # Сколько последних пациентов помнить (ФИО/пол), чтобы переключение между ними не ходило в БД
+    _BRIEF_CACHE_SIZE = 8
+
     protocol_saved = QtCore.Signal(int)  # patient_id
     back_requested = QtCore.Signal()
     search_requested = QtCore.Signal()
@@ -35,6 +39,7 @@ class ProtocolArea(QtWidgets.QWidget):
         self.patient_gender: str | None = None
         self._builder: ProtocolBuilderQt | None = None
         self._builder_read_only: bool = False
+        self._brief_cache: OrderedDict[int, tuple[str, str]] = OrderedDict()
 
         self._build_ui()
         self._load_studies()
@@ -232,17 +237,25 @@ class ProtocolArea(QtWidgets.QWidget):
 
     def set_patient(self, patient_id: int | None) -> None:
         self.patient_id = patient_id
-        self.patient_gender = None
         self._builder = None
         self._builder_read_only = False
         self.body_stack.setCurrentWidget(self.placeholder)
+        self._show_patient_title()
+        self._sync_state()
+
+    def is_idle(self) -> bool:
+        """Протокол не открыт (показана заглушка): set_patient для того же пациента ничего не изменит."""
+        return self._builder is None
 
+    def _show_patient_title(self) -> None:
+        patient_id = self.patient_id
+        self.patient_gender = None
         if not patient_id:
             self._title_full_text = "Окно протокола"
             self.title_label.setStyleSheet("background: transparent; border: 0; color: #000;")
             self.title_label.setToolTip("")
         else:
-            brief = get_patient_brief(patient_id)
+            brief = self._patient_brief(patient_id)
             if brief:
                 name, gender = brief
                 self.patient_gender = gender
@@ -255,7 +268,27 @@ class ProtocolArea(QtWidgets.QWidget):
                 self.title_label.setStyleSheet("background: transparent; border: 0; color: #b00020;")
 
         self._update_title_elide()
-        self._sync_state()
+
+    def _patient_brief(self, patient_id: int) -> tuple[str, str] | None:
+        brief = self._brief_cache.get(patient_id)
+        if brief is not None:
+            self._brief_cache.move_to_end(patient_id)
+            return brief
+        brief = get_patient_brief(patient_id)
+        # "Не найден" не запоминаем: пациент с этим id ещё может появиться
+        if brief is not None:
+            self._brief_cache[patient_id] = brief
+            if len(self._brief_cache) > self._BRIEF_CACHE_SIZE:
+                self._brief_cache.popitem(last=False)
+        return brief
+
+    def forget_patient(self, patient_id: int) -> None:
+        """Сбросить запомненные ФИО/пол пациента (после редактирования или удаления)."""
+        self._brief_cache.pop(int(patient_id), None)
+        # Пациент сейчас открыт справа — заголовок обновляем сразу, открытый протокол не трогаем
+        if self.patient_id is not None and int(self.patient_id) == int(patient_id):
+            self._show_patient_title()
+            self._sync_state()
 
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
         super().resizeEvent(event)
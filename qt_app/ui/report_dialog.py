@@ -214,6 +214,11 @@ class ReportDialog(QtWidgets.QDialog):
 
         self.month_combo.setCurrentIndex(0)
 
+    def reset(self) -> None:
+        """Перечитать фильтры (годы/типы/каналы могли измениться) и очистить прошлый отчёт."""
+        self._load_filters()
+        self._clear()
+
     def _params(self) -> ReportParams:
         year = self.year_combo.currentText()
         month_num = self.month_combo.currentData()
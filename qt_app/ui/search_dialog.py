@@ -84,9 +84,7 @@ class SearchDialog(QtWidgets.QDialog):
         self.study = AutoComboBox(max_popup_items=30)
         self.study.setMinimumWidth(260)
         self.study.setMinimumHeight(_row_h)
-        self.study.addItem("Все", None)
-        for it in list_study_types():
-            self.study.addItem(it.name, it.id)
+        self._load_studies()
         grid.addWidget(self.study, 2, 1, 1, 2)
 
         # give date columns some room
@@ -129,6 +127,19 @@ class SearchDialog(QtWidgets.QDialog):
         self.use_period.toggled.connect(_refresh_period_enabled)
         _refresh_period_enabled()
 
+    def reset(self) -> None:
+        """Сбросить результат и форму перед повторным показом."""
+        self.result = None
+        # Типы исследований могли добавить/переименовать в настройках между показами
+        self._load_studies()
+        self._clear_form()
+
+    def _load_studies(self) -> None:
+        self.study.clear()
+        self.study.addItem("Все", None)
+        for it in list_study_types():
+            self.study.addItem(it.name, it.id)
+
     @QtCore.Slot()
     def _clear(self) -> None:
         self.result = SearchResult(patient_ids=[])
@@ -3,11 +3,14 @@ from __future__ import annotations
 from PySide6 import QtCore, QtWidgets
 
 from ..db import connect
+from ..repo import invalidate_lookup_cache
 from .auto_combo import AutoComboBox
 
 
 class SettingsSystemDialog(QtWidgets.QDialog):
     changed = QtCore.Signal()
+    # Только при реальной записи в БД (в отличие от changed, который шлёт каждая перезагрузка таблиц)
+    data_changed = QtCore.Signal()
 
     def __init__(self, parent: QtWidgets.QWidget | None = None):
         super().__init__(parent)
@@ -140,7 +143,7 @@ class SettingsSystemDialog(QtWidgets.QDialog):
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось добавить: {e}")
                 return
-        self._load_all()
+        self._on_data_mutated()
 
     def _edit_institution(self) -> None:
         inst_id = self._selected_id(self.inst_table)
@@ -157,7 +160,7 @@ class SettingsSystemDialog(QtWidgets.QDialog):
         with connect() as conn:
             conn.execute("UPDATE institutions SET name = ?, is_active = ? WHERE id = ?", (name, 1 if active else 0, inst_id))
             conn.commit()
-        self._load_all()
+        self._on_data_mutated()
 
     def _delete_institution(self) -> None:
         inst_id = self._selected_id(self.inst_table)
@@ -172,7 +175,7 @@ class SettingsSystemDialog(QtWidgets.QDialog):
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Ошибка", f"Не удалось удалить: {e}")
                 return
-        self._load_all()
+        self._on_data_mutated()
 
     # ---------- Doctors ----------
     def _build_doctors_tab(self) -> None:
@@ -288,7 +291,7 @@ class SettingsSystemDialog(QtWidgets.QDialog):
                 (name, int(inst_id), 1 if active else 0),
             )
             conn.commit()
-        self._load_all()
+        self._on_data_mutated()
 
     def _edit_doctor(self) -> None:
         doc_id = self._selected_id(self.doc_table)
@@ -305,7 +308,7 @@ class SettingsSystemDialog(QtWidgets.QDialog):
         with connect() as conn:
             conn.execute("UPDATE doctors SET full_name = ?, is_active = ? WHERE id = ?", (name, 1 if active else 0, doc_id))
             conn.commit()
-        self._load_all()
+        self._on_data_mutated()
 
     def _delete_doctor(self) -> None:
         doc_id = self._selected_id(self.doc_table)
@@ -316,7 +319,7 @@ class SettingsSystemDialog(QtWidgets.QDialog):
         with connect() as conn:
             conn.execute("DELETE FROM doctors WHERE id = ?", (doc_id,))
             conn.commit()
-        self._load_all()
+        self._on_data_mutated()
 
     # ---------- All ----------
     def _load_all(self) -> None:
@@ -325,3 +328,8 @@ class SettingsSystemDialog(QtWidgets.QDialog):
         self._load_doctors()
         self.changed.emit()
 
+    def _on_data_mutated(self) -> None:
+        invalidate_lookup_cache()
+        self.data_changed.emit()
+        self._load_all()
+
@@ -22,6 +22,14 @@ class PrintUiSettings:
     default_variant: str = "unsigned"
 
 
+# Счётчик сохранений путей к внешним файлам: по нему окна сбрасывают прочитанные настройки
+_external_files_version = 0
+
+
+def external_files_version() -> int:
+    return _external_files_version
+
+
 def _settings_path() -> Path:
     d = ultrasound_dir()
     d.mkdir(parents=True, exist_ok=True)
@@ -61,6 +69,7 @@ def load_print_ui_settings() -> PrintUiSettings:
 
 
 def save_external_files_settings(s: ExternalFilesSettings) -> None:
+    global _external_files_version
     p = _settings_path()
     # merge with existing json (same file)
     try:
@@ -73,6 +82,7 @@ def save_external_files_settings(s: ExternalFilesSettings) -> None:
         "about_path": s.about_path or "",
     })
     p.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    _external_files_version += 1
 
 
 def save_print_ui_settings(s: PrintUiSettings) -> None: